@@ -1,79 +1,107 @@
-from flask import Flask, render_template, request, redirect, session, flash
-import sqlite3
+from flask import Flask, render_template, request, redirect, session, flash, jsonify, send_file, url_for, abort, make_response, Response
+import click
 import os
+import mimetypes
 from datetime import datetime
 
+import assets
+import compression
+import db
+import export
+import metrics
+import migrations
+import page_cache
+import passwords
+import pdf_export
+import photos
+import profiles
+import suggest
+import user_cache
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'fallback-secret-key-for-dev')
+db.init_app(app)
+metrics.init_app(app)
+compression.init_app(app)
 
+# С PostgreSQL приложение работает в нескольких экземплярах, а фотографии и PDF
+# хранятся в файлах: каталоги должны быть общим хранилищем и задаваться явно,
+# иначе файл, загруженный на одном экземпляре, не найдется на другом
+if db.BACKEND == 'postgresql':
+    missing = [name for name in ('PHOTO_STORE_DIR', 'PDF_CACHE_DIR') if not os.environ.get(name)]
+    if missing:
+        raise RuntimeError(f'С DATABASE_URL=postgresql://... задайте {", ".join(missing)}: '
+                           f'общий для всех экземпляров каталог (сетевой диск, общий том)')
 
 
-# Таблицы для хранения пользователей и их данных
-def create_tables():
-    connection = sqlite3.connect('users.db')
-    cursor = connection.cursor()
-    
-    # Таблица пользователей
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL UNIQUE,
-        password TEXT NOT NULL
-    )
-    ''')
-    
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS user_profiles (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        full_name TEXT,
-        birth_date TEXT,
-        email TEXT,
-        phone TEXT,
-        bio TEXT,
-        skills TEXT,
-        job_position TEXT,
-        salary_expectations TEXT,
-        education TEXT,
-        courses TEXT,
-        certificates TEXT,
-        github TEXT,
-        linkedin TEXT,
-        vk TEXT,
-        telegram TEXT,
-        portfolio_link TEXT,
-        photo TEXT,
-        experience TEXT,
-        languages TEXT,
-        is_completed BOOLEAN DEFAULT FALSE,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Создаем администратора по умолчанию
-    cursor.execute("SELECT * FROM users WHERE username = 'admin'")
-    admin_exists = cursor.fetchone()
-    if not admin_exists:
-        cursor.execute('INSERT INTO users (username, password) VALUES (?, ?)', ('admin', 'admin123'))
-        print("Администратор создан: admin / admin123")
-
-    connection.commit()
-    connection.close()
-    print("Таблицы созданы успешно с новыми полями")
-
-# Измените путь к базе данных для Render
+# Ссылка на фотографию профиля для шаблонов
+@app.template_global()
+def photo_url(photo, variant='thumb'):
+    if photos.is_photo_hash(photo):
+        return url_for('photo', photo_hash=photo, variant=variant)
+    # Фотографии, которые миграция 8 не смогла перенести в хранилище
+    return photo
+
+# Ссылка на статический бандл с хэшем содержимого в имени файла
+@app.template_global()
+def asset_url(name):
+    return url_for('asset', filename=assets.get_manifest(check_sources=app.debug)[name])
+
+
+
+# Соединение берется из пула воркера и возвращается в него по окончании запроса
 def get_db_connection():
-    # На Render используем PostgreSQL если доступно
-    database_url = os.environ.get('DATABASE_URL')
-    if database_url and database_url.startswith('postgresql://'):
-        # Для PostgreSQL потребуется другая конфигурация
-        # Пока оставим SQLite для простоты
-        pass
-    
-    conn = sqlite3.connect('users.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    return db.get_db()
+
+# Проверка пароля; пароли открытым текстом и хэши с прежней стоимостью
+# перехэшируются при успешном входе
+def authenticate(connection, username, password):
+    row = profiles.get_credentials(connection, username)
+    if row is None:
+        passwords.hasher.verify(None, password)
+        return None
+    ok, needs_upgrade = passwords.hasher.verify(row['password'], password)
+    if not ok:
+        return None
+    if needs_upgrade:
+        try:
+            profiles.update_password(connection, row['id'], row['password'],
+                                     passwords.hasher.hash(password))
+            connection.commit()
+        except passwords.QueueFull:
+            # Перехэшируем при следующем входе
+            pass
+    return row
+
+def busy_response(template):
+    response = make_response(render_template(
+        template, error="Сервер перегружен, повторите попытку через несколько секунд"), 503)
+    response.headers['Retry-After'] = '5'
+    return response
+
+# Имя и статус профиля текущего пользователя: из кэша воркера, при промахе из базы.
+# None, если пользователя из сессии больше нет.
+def current_user_state(require_completed=False):
+    user_id = session['user_id']
+    load = lambda: profiles.get_user_state(get_db_connection(), user_id)
+    state = user_cache.users.get(user_id, load)
+    if require_completed and state is not None and not state.is_completed:
+        # Профиль мог опубликовать администратор в другом воркере или экземпляре
+        user_cache.users.invalidate(user_id)
+        state = user_cache.users.get(user_id, load)
+    return state
+
+# Администратор определяется по имени в сессии и записи в базе: сессия,
+# выданная до миграции 9 удаленному дубликату имени admin, прав не дает
+def is_admin():
+    if session.get('username') != 'admin' or 'user_id' not in session:
+        return False
+    state = current_user_state()
+    return state is not None and state.username == 'admin'
+
+def profile_not_ready():
+    flash('Ваше портфолио еще не проверено администратором или не заполнено.', 'warning')
+    return redirect('/user')
 
 @app.route('/')
 def index():
@@ -93,14 +121,17 @@ def register():
             return render_template('register.html', error="Пароль должен содержать минимум 6 символов")
 
         try:
+            password_hash = passwords.hasher.hash(password)
             connection = get_db_connection()
-            cursor = connection.cursor()
-            cursor.execute('INSERT INTO users (username, password) VALUES (?, ?)', (username, password))
+            profiles.create_user(connection, username, password_hash)
             connection.commit()
-            connection.close()
+            user_cache.admin_stats.invalidate('statuses')
             flash('Регистрация успешна! Теперь вы можете войти.', 'success')
             return redirect('/login')
-        except sqlite3.IntegrityError:
+        except passwords.QueueFull:
+            return busy_response('register.html')
+        except db.IntegrityError:
+            connection.rollback()
             return render_template('register.html', error="Пользователь с таким именем уже существует")
         except Exception as e:
             print(f"Ошибка регистрации: {e}")
@@ -116,10 +147,7 @@ def login():
         
         try:
             connection = get_db_connection()
-            cursor = connection.cursor()
-            cursor.execute("SELECT id FROM users WHERE username = ? AND password = ?", (username, password))
-            user = cursor.fetchone()
-            connection.close()
+            user = authenticate(connection, username, password)
             
             if user:
                 session['user_id'] = user['id']
@@ -131,6 +159,8 @@ def login():
                     return redirect('/user')      
             else:
                 return render_template('login.html', error="Неверное имя пользователя или пароль")
+        except passwords.QueueFull:
+            return busy_response('login.html')
         except Exception as e:
             print(f"Ошибка входа: {e}")
             return render_template('login.html', error="Ошибка базы данных")
@@ -142,30 +172,31 @@ def admin():
     if 'username' not in session:
         return redirect('/login')
     
-    if session['username'] != 'admin':
+    if not is_admin():
         return redirect('/user')
 
-    # Получаем список всех пользователей (кроме админа) с их профилями
+    status = request.args.get('status', '')
+    search = request.args.get('q', '').strip()
+    after = profiles.parse_cursor(request.args.get('after'))
+
+    # Получаем страницу пользователей (кроме админа) с их профилями
     try:
         connection = get_db_connection()
-        users = connection.execute('''
-            SELECT u.id, u.username, up.full_name, up.birth_date, up.is_completed 
-            FROM users u 
-            LEFT JOIN user_profiles up ON u.id = up.user_id 
-            WHERE u.username != 'admin'
-            ORDER BY up.is_completed, u.id
-        ''').fetchall()
-        connection.close()
+        users, next_cursor = profiles.list_user_summaries(connection, status, search, after)
+        stats = user_cache.admin_stats.get('statuses', lambda: profiles.count_user_statuses(connection))
     except Exception as e:
         print(f"Ошибка получения пользователей: {e}")
-        users = []
+        users, next_cursor = [], None
+        stats = {'total': 0, 'completed': 0, 'pending': 0, 'empty': 0}
     
-    return render_template('admin.html', users=users, username=session['username'])
+    return render_template('admin.html', users=users, username=session['username'],
+                           stats=stats, status=status, search=search,
+                           next_cursor=next_cursor, is_first_page=after is None)
 
 # Редактирование профиля пользователя админом
 @app.route('/admin/edit_user/<int:user_id>', methods=['GET', 'POST'])
 def edit_user(user_id):
-    if 'username' not in session or session['username'] != 'admin':
+    if not is_admin():
         return redirect('/login')
     
     connection = get_db_connection()
@@ -200,58 +231,38 @@ def edit_user(user_id):
                 pass
 
         try:
-            # Проверяем, существует ли уже профиль
-            existing_profile = connection.execute(
-                'SELECT * FROM user_profiles WHERE user_id = ?', (user_id,)
-            ).fetchone()
-            
-            if existing_profile:
-                # Обновляем существующий профиль и отмечаем как завершенный
-                connection.execute('''
-                    UPDATE user_profiles 
-                    SET full_name = ?, birth_date = ?, email = ?, phone = ?, 
-                        bio = ?, skills = ?, job_position = ?, salary_expectations = ?,
-                        education = ?, courses = ?, certificates = ?, github = ?,
-                        linkedin = ?, vk = ?, telegram = ?, portfolio_link = ?,
-                        is_completed = TRUE
-                    WHERE user_id = ?
-                ''', (full_name, birth_date, email, phone, bio, skills, 
-                      job_position, salary_expectations, education, courses,
-                      certificates, github, linkedin, vk, telegram, 
-                      portfolio_link, user_id))
-            else:
-                # Создаем новый профиль и отмечаем как завершенный
-                connection.execute('''
-                    INSERT INTO user_profiles 
-                    (user_id, full_name, birth_date, email, phone, bio, skills,
-                     job_position, salary_expectations, education, courses, certificates,
-                     github, linkedin, vk, telegram, portfolio_link, is_completed)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, TRUE)
-                ''', (user_id, full_name, birth_date, email, phone, bio, skills,
-                      job_position, salary_expectations, education, courses,
-                      certificates, github, linkedin, vk, telegram, portfolio_link))
+            # Создаем или обновляем профиль и отмечаем как завершенный
+            profiles.upsert_profile(connection, user_id, {
+                'full_name': full_name, 'birth_date': birth_date, 'email': email,
+                'phone': phone, 'bio': bio, 'skills': skills, 'job_position': job_position,
+                'salary_expectations': salary_expectations, 'education': education,
+                'courses': courses, 'certificates': certificates, 'github': github,
+                'linkedin': linkedin, 'vk': vk, 'telegram': telegram,
+                'portfolio_link': portfolio_link,
+            }, is_completed=True)
             
             connection.commit()
+            page_cache.pages.invalidate_user(user_id)
+            user_cache.users.invalidate(user_id)
+            user_cache.admin_stats.invalidate('statuses')
+            suggest.suggestions.add_profile({'education': education, 'skills': skills,
+                                             'job_position': job_position})
             flash('Профиль пользователя успешно сохранен и опубликован!', 'success')
 
         except Exception as e:
             print(f"Ошибка сохранения профиля: {e}")
             flash(f'Ошибка при сохранении профиля: {str(e)}', 'error')
-        finally:
-            connection.close()
         
         return redirect('/admin')
     
     # GET запрос - получаем данные пользователя
     try:
-        user = connection.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        profile = connection.execute('SELECT * FROM user_profiles WHERE user_id = ?', (user_id,)).fetchone()
+        user = profiles.get_user(connection, user_id)
+        profile = profiles.get_profile(connection, user_id, profiles.EDIT_FIELDS, with_entries=True)
     except Exception as e:
         print(f"Ошибка получения данных: {e}")
         user = None
         profile = None
-    finally:
-        connection.close()
     
     if not user:
         flash('Пользователь не найден', 'error')
@@ -259,6 +270,69 @@ def edit_user(user_id):
     
     return render_template('edit_user.html', user=user, profile=profile)
 
+# Массовая публикация / снятие с публикации выбранных профилей одной транзакцией
+@app.route('/admin/batch', methods=['POST'])
+def admin_batch():
+    if not is_admin():
+        return redirect('/login')
+
+    action = request.form.get('action')
+    try:
+        user_ids = [int(user_id) for user_id in request.form.getlist('user_ids')]
+    except ValueError:
+        user_ids = []
+
+    if action not in ('approve', 'reject') or not user_ids:
+        flash('Выберите пользователей и действие', 'warning')
+        return redirect(request.referrer or '/admin')
+
+    connection = get_db_connection()
+    try:
+        updated = profiles.set_completed(connection, user_ids, action == 'approve')
+        connection.commit()
+        for user_id in user_ids:
+            page_cache.pages.invalidate_user(user_id)
+            user_cache.users.invalidate(user_id)
+        user_cache.admin_stats.invalidate('statuses')
+        if action == 'approve':
+            flash(f'Опубликовано профилей: {updated}', 'success')
+        else:
+            flash(f'Снято с публикации профилей: {updated}', 'success')
+    except Exception as e:
+        connection.rollback()
+        print(f"Ошибка массового изменения профилей: {e}")
+        flash(f'Ошибка при изменении профилей: {str(e)}', 'error')
+
+    return redirect(request.referrer or '/admin')
+
+# Выгрузка опубликованных профилей в CSV или JSONL потоком
+@app.route('/admin/export.<fmt>')
+def admin_export(fmt):
+    if not is_admin():
+        return redirect('/login')
+
+    if fmt == 'csv':
+        stream, mimetype = export.csv_stream, 'text/csv'
+    elif fmt == 'jsonl':
+        stream, mimetype = export.jsonl_stream, 'application/x-ndjson'
+    else:
+        abort(404)
+
+    # Генератор выполняется после выхода из обработчика, поэтому держит
+    # собственное соединение из пула, а не соединение запроса
+    def generate():
+        pool = db.get_pool()
+        connection = pool.acquire()
+        try:
+            cursor = profiles.export_completed(connection)
+            yield from stream(cursor, profiles.EXPORT_FIELDS)
+        finally:
+            pool.release(connection)
+
+    filename = f"profiles-{datetime.now().strftime('%Y%m%d')}.{fmt}"
+    return Response(generate(), content_type=f'{mimetype}; charset=utf-8',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 @app.route('/user')
 def user():
     if 'username' not in session:
@@ -266,19 +340,21 @@ def user():
     
     # Проверяем, есть ли у пользователя заполненный профиль
     try:
-        connection = get_db_connection()
-        profile = connection.execute('''
-            SELECT * FROM user_profiles 
-            WHERE user_id = ? AND is_completed = TRUE
-        '''.strip(), (session['user_id'],)).fetchone()
-        connection.close()
+        state = current_user_state()
+        if state is None:
+            session.clear()
+            return redirect('/login')
+        has_portfolio = state.is_completed
+        public_slug = state.public_slug if has_portfolio else None
     except Exception as e:
         print(f"Ошибка получения профиля: {e}")
-        profile = None
+        has_portfolio = False
+        public_slug = None
     
     return render_template('user.html', 
                          username=session['username'],
-                         has_portfolio=profile is not None)
+                         has_portfolio=has_portfolio,
+                         public_slug=public_slug)
 
 @app.route('/user/create_portfolio')
 def create_portfolio():
@@ -288,33 +364,33 @@ def create_portfolio():
     # Получаем данные профиля пользователя (если уже есть)
     try:
         connection = get_db_connection()
-        profile = connection.execute('''
-            SELECT * FROM user_profiles 
-            WHERE user_id = ?
-        '''.strip(), (session['user_id'],)).fetchone()
-        connection.close()
+        profile = profiles.get_profile(connection, session['user_id'], profiles.FORM_FIELDS)
     except Exception as e:
         print(f"Ошибка получения профиля: {e}")
         profile = None
     
-    # Список популярных учебных заведений для автозаполнения
-    education_suggestions = [
-        "Московский государственный университет",
-        "Санкт-Петербургский государственный университет",
-        "Высшая школа экономики",
-        "Московский физико-технический институт",
-        "Новосибирский государственный университет",
-        "Московский государственный технический университет",
-        "Уральский федеральный университет",
-        "Казанский федеральный университет",
-        "Томский государственный университет",
-        "Российский университет дружбы народов"
-    ]
-    
     return render_template('create_portfolio.html', 
                          username=session['username'],
-                         profile=profile,
-                         education_suggestions=education_suggestions)
+                         profile=profile)
+
+# Подсказки для образования, навыков и должности по введенному началу
+@app.route('/api/suggest/<field>')
+def suggest_values(field):
+    if 'username' not in session:
+        abort(401)
+    if field not in suggest.SUGGEST_FIELDS:
+        abort(404)
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', suggest.SUGGEST_LIMIT)), 50))
+    except ValueError:
+        limit = suggest.SUGGEST_LIMIT
+
+    suggest.suggestions.ensure_fresh(get_db_connection())
+    response = jsonify(suggest.suggestions.search(field, request.args.get('q', ''), limit))
+    response.cache_control.private = True
+    response.cache_control.max_age = 60
+    return response
 
 @app.route('/user/save_portfolio', methods=['POST'])
 def save_portfolio():
@@ -348,30 +424,20 @@ def save_portfolio():
         end_dates = request.form.getlist('end_date[]')
         responsibilities = request.form.getlist('responsibilities[]')
         
-        # Формируем опыт работы в текстовом виде
-        experience_parts = []
+        # Опыт работы сохраняется в profile_experience по записи на место работы
+        experience_entries = []
         for i in range(len(companies)):
             if companies[i] and positions[i]:
-                exp_text = f"{companies[i]} - {positions[i]}\n"
-                if start_dates[i]:
-                    exp_text += f"Период: {start_dates[i]}"
-                    if end_dates[i]:
-                        exp_text += f" - {end_dates[i]}\n"
-                    else:
-                        exp_text += " - по настоящее время\n"
-                if responsibilities[i]:
-                    exp_text += f"Обязанности: {responsibilities[i]}\n"
-                experience_parts.append(exp_text)
-        
-        experience = "\n---\n".join(experience_parts) if experience_parts else ""
+                experience_entries.append(profiles.ExperienceEntry(
+                    companies[i], positions[i], start_dates[i], end_dates[i], responsibilities[i]))
         
         # Получаем языки
         languages_list = request.form.getlist('language[]')
         language_levels = request.form.getlist('language_level[]')
-        languages_text = ""
+        language_entries = []
         for i in range(len(languages_list)):
             if languages_list[i] and language_levels[i]:
-                languages_text += f"{languages_list[i]} ({language_levels[i]})\n"
+                language_entries.append(profiles.LanguageEntry(languages_list[i], language_levels[i]))
         
         # Обработка даты
         if birth_date:
@@ -384,43 +450,32 @@ def save_portfolio():
                 print(f"Ошибка обработки даты: {e}")
                 pass
         
+        # Новая фотография сохраняется в хранилище, в профиль пишется только ее хэш.
+        # Без новой загрузки прежняя фотография остается на месте.
+        photo_hash = photos.save_photo(photos.decode_data_url(photo_data)) if photo_data else None
+        
         connection = get_db_connection()
         
-        # Проверяем, существует ли уже профиль
-        existing_profile = connection.execute(
-            'SELECT * FROM user_profiles WHERE user_id = ?', (session['user_id'],)
-        ).fetchone()
-        
-        if existing_profile:
-            # Обновляем существующий профиль
-            connection.execute('''
-                UPDATE user_profiles 
-                SET full_name = ?, birth_date = ?, email = ?, phone = ?, 
-                    bio = ?, skills = ?, job_position = ?, salary_expectations = ?,
-                    education = ?, courses = ?, certificates = ?, github = ?,
-                    linkedin = ?, vk = ?, telegram = ?, portfolio_link = ?, 
-                    photo = ?, experience = ?, languages = ?, is_completed = FALSE
-                WHERE user_id = ?
-            ''', (full_name, birth_date, email, phone, bio, skills, job_position,
-                  salary_expectations, education, courses, certificates, github,
-                  linkedin, vk, telegram, portfolio_link, photo_data, 
-                  experience, languages_text, session['user_id']))
-        else:
-            # Создаем новый профиль
-            connection.execute('''
-                INSERT INTO user_profiles 
-                (user_id, full_name, birth_date, email, phone, bio, skills, 
-                 job_position, salary_expectations, education, courses, certificates,
-                 github, linkedin, vk, telegram, portfolio_link, photo, experience, 
-                 languages, is_completed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, FALSE)
-            ''', (session['user_id'], full_name, birth_date, email, phone, bio, skills,
-                  job_position, salary_expectations, education, courses, certificates,
-                  github, linkedin, vk, telegram, portfolio_link, photo_data, 
-                  experience, languages_text))
+        # Создаем или обновляем профиль; текстовые experience/languages
+        # больше не используются и очищаются
+        profiles.upsert_profile(connection, session['user_id'], {
+            'full_name': full_name, 'birth_date': birth_date, 'email': email,
+            'phone': phone, 'bio': bio, 'skills': skills, 'job_position': job_position,
+            'salary_expectations': salary_expectations, 'education': education,
+            'courses': courses, 'certificates': certificates, 'github': github,
+            'linkedin': linkedin, 'vk': vk, 'telegram': telegram,
+            'portfolio_link': portfolio_link, 'photo': photo_hash,
+            'experience': None, 'languages': None,
+        }, is_completed=False)
         
+        profiles.replace_experience(connection, session['user_id'], experience_entries)
+        profiles.replace_languages(connection, session['user_id'], language_entries)
         connection.commit()
-        connection.close()
+        page_cache.pages.invalidate_user(session['user_id'])
+        user_cache.users.invalidate(session['user_id'])
+        user_cache.admin_stats.invalidate('statuses')
+        suggest.suggestions.add_profile({'education': education, 'skills': skills,
+                                         'job_position': job_position})
         
         flash('Ваши данные сохранены! Ожидайте проверки администратора.', 'success')
         return redirect('/user')
@@ -430,29 +485,96 @@ def save_portfolio():
         flash(f"Ошибка при сохранении: {str(e)}", 'error')
         return redirect('/user/create_portfolio')
     
+# Отрендеренная страница опубликованного профиля текущего пользователя:
+# из кэша, если профиль не менялся. None, если опубликованного профиля нет.
+def get_profile_page(template, fields, **context):
+    user_id = session['user_id']
+    version = profiles.get_profile_version(get_db_connection(), user_id)
+    if version is None:
+        return None
+    # Версия сборки бандлов в ключе: после деплоя браузер не получит 304
+    # на HTML со ссылками на удаленные бандлы
+    key = (user_id, f'{template}@{assets.build_id()}')
+    return build_profile_page(user_id, version, key, template, fields, **context)
+
+def build_profile_page(user_id, version, key, template, fields, **context):
+    entry = page_cache.pages.get(key, version)
+    if entry is None:
+        profile = profiles.get_profile(get_db_connection(), user_id, fields,
+                                       completed_only=True, with_entries=True)
+        if not profile:
+            return None
+        body = render_template(template, profile=profile, **context).encode('utf-8')
+        entry = page_cache.pages.put(key, body, version)
+    return entry
+
+# То же в виде ответа с поддержкой условных запросов (ETag / Last-Modified -> 304)
+def render_profile_page(template, fields, **context):
+    entry = get_profile_page(template, fields, **context)
+    if entry is None:
+        return None
+
+    response = make_response(entry.body)
+    response.set_etag(entry.etag)
+    if entry.last_modified:
+        response.last_modified = entry.last_modified
+    # Страница принадлежит сессии: общие кэши не должны ее хранить
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# Публичные страницы опубликованного профиля по ссылке /p/<slug>: без сессии,
+# поэтому их могут хранить общие кэши (CDN, reverse proxy). Валидаторы берутся
+# из updated_at и меняются только при сохранении профиля.
+PUBLIC_PAGE_MAX_AGE = int(os.environ.get('PUBLIC_PAGE_MAX_AGE', '300'))
+
+def render_public_page(slug, template, fields):
+    found = profiles.get_public_version(get_db_connection(), slug)
+    if found is None:
+        abort(404)
+
+    user_id, version = found
+    # Версия сборки бандлов в ключе: после деплоя меняется ETag
+    key = (user_id, f'public/{template}@{assets.build_id()}')
+    entry = build_profile_page(user_id, version, key, template, fields, public=True, public_slug=slug)
+    if entry is None:
+        abort(404)
+
+    response = make_response(entry.body)
+    response.set_etag(entry.etag)
+    if entry.last_modified:
+        response.last_modified = entry.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = PUBLIC_PAGE_MAX_AGE
+    return response.make_conditional(request)
+
+@app.route('/p/<slug>')
+def public_portfolio(slug):
+    return render_public_page(slug, 'view_portfolio.html', profiles.PORTFOLIO_FIELDS)
+
+@app.route('/p/<slug>/resume')
+def public_resume(slug):
+    return render_public_page(slug, 'resume.html', profiles.RESUME_FIELDS)
+
 @app.route('/user/view_portfolio')
 def view_portfolio():
     if 'username' not in session:
         return redirect('/login')
     
     try:
-        connection = get_db_connection()
-        profile = connection.execute('''
-            SELECT * FROM user_profiles 
-            WHERE user_id = ? AND is_completed = TRUE
-        ''', (session['user_id'],)).fetchone()
-        connection.close()
+        state = current_user_state(require_completed=True)
+        response = None
+        if state and state.is_completed:
+            response = render_profile_page('view_portfolio.html', profiles.PORTFOLIO_FIELDS,
+                                           username=session['username'])
     except Exception as e:
         print(f"Ошибка получения профиля: {e}")
-        profile = None
+        response = None
     
-    if not profile:
-        flash('Ваше портфолио еще не проверено администратором или не заполнено.', 'warning')
-        return redirect('/user')
+    if not response:
+        return profile_not_ready()
     
-    return render_template('view_portfolio.html', 
-                         username=session['username'],
-                         profile=profile)
+    return response
 
 @app.route('/user/generate_resume')
 def generate_resume():
@@ -461,24 +583,181 @@ def generate_resume():
     
     # Получаем данные профиля пользователя только если он завершен админом
     try:
-        connection = get_db_connection()
-        profile = connection.execute('''
-            SELECT * FROM user_profiles 
-            WHERE user_id = ? AND is_completed = TRUE
-        ''', (session['user_id'],)).fetchone()
-        connection.close()
+        state = current_user_state(require_completed=True)
+        response = None
+        if state and state.is_completed:
+            response = render_profile_page('resume.html', profiles.RESUME_FIELDS,
+                                           username=session['username'],
+                                           now=datetime.now())
     except Exception as e:
         print(f"Ошибка получения профиля: {e}")
-        profile = None
+        response = None
     
-    if not profile:
-        flash('Ваше портфолио еще не проверено администратором или не заполнено.', 'warning')
-        return redirect('/user')
+    if not response:
+        return profile_not_ready()
     
-    return render_template('resume.html', 
-                         username=session['username'],
-                         profile=profile,
-                         now=datetime.now())
+    return response
+
+# PDF-версия резюме. Готовый файл для текущей версии профиля отдается сразу,
+# иначе рендер ставится в фоновую очередь и клиент получает 202 со ссылкой на статус.
+@app.route('/user/generate_resume/pdf')
+def generate_resume_pdf():
+    if 'username' not in session:
+        return redirect('/login')
+
+    try:
+        state = current_user_state(require_completed=True)
+        entry = None
+        if state and state.is_completed:
+            entry = get_profile_page('resume.html', profiles.RESUME_FIELDS,
+                                     username=session['username'],
+                                     now=datetime.now())
+    except Exception as e:
+        print(f"Ошибка получения профиля: {e}")
+        entry = None
+
+    if not entry:
+        return jsonify(status='not_found',
+                       error='Ваше портфолио еще не проверено администратором или не заполнено.'), 404
+
+    user_id = session['user_id']
+    path = pdf_export.pdf_path(user_id, entry.etag)
+    if os.path.exists(path):
+        return send_file(os.path.abspath(path), mimetype='application/pdf', as_attachment=True,
+                         download_name='resume.pdf', etag=entry.etag,
+                         last_modified=entry.last_modified, max_age=0)
+
+    job_id = f'{user_id}-{entry.etag}'
+    try:
+        job = pdf_export.queue.submit(job_id, user_id, entry.body.decode('utf-8'), path)
+    except pdf_export.QueueFull:
+        response = jsonify(status='busy', error='Сервер занят, повторите попытку позже.')
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    status_url = url_for('resume_pdf_status', job_id=job.id)
+    response = jsonify(job_id=job.id, status=job.status, status_url=status_url)
+    response.headers['Location'] = status_url
+    return response, 202
+
+@app.route('/user/generate_resume/pdf/jobs/<job_id>')
+def resume_pdf_status(job_id):
+    if 'username' not in session:
+        return redirect('/login')
+
+    user_id = session['user_id']
+    owner, _, version_key = job_id.partition('-')
+    if owner != str(user_id) or not version_key.isalnum():
+        return jsonify(status='not_found'), 404
+
+    # Задача могла попасть в другой воркер: ее статус берется по файлу и меткам
+    # на диске. Задача, которую никто не выполняет (воркер перезапущен), получает
+    # статус 'unknown', и клиент ставит ее заново через generate_resume_pdf
+    job = pdf_export.queue.get(job_id)
+    path = pdf_export.pdf_path(user_id, version_key)
+    if os.path.exists(path):
+        status, error = 'done', None
+    elif job:
+        status, error = job.status, job.error
+    else:
+        status, error = pdf_export.disk_status(path)
+
+    result = {'job_id': job_id, 'status': status}
+    if status == 'done':
+        result['download_url'] = url_for('generate_resume_pdf')
+    elif status == 'failed':
+        result['error'] = error
+    return jsonify(result)
+
+# Статистика пула соединений текущего воркера
+@app.route('/admin/db_stats')
+def db_stats():
+    if not is_admin():
+        return redirect('/login')
+
+    return jsonify(pid=os.getpid(), pool=db.get_pool().stats(), page_cache=page_cache.pages.stats(),
+                   user_cache=user_cache.users.stats(), pdf_queue=pdf_export.queue.stats(),
+                   password_hasher=passwords.hasher.stats())
+
+# Фотографии профилей: имя файла определяется содержимым, поэтому кэшируются навсегда
+@app.route('/photos/<photo_hash>/<variant>.jpg')
+def photo(photo_hash, variant):
+    if not photos.is_photo_hash(photo_hash) or variant not in photos.VARIANTS:
+        abort(404)
+
+    path = photos.variant_path(photo_hash, variant)
+    if not os.path.exists(path):
+        abort(404)
+
+    response = send_file(os.path.abspath(path), mimetype='image/jpeg',
+                         etag=f'{photo_hash}-{variant}', max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# Бандлы CSS/JS: имя меняется вместе с содержимым, поэтому кэшируются навсегда.
+# Сжатая копия выбирается по Accept-Encoding.
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    path, encoding = assets.resolve(filename, request.accept_encodings)
+    if path is None:
+        abort(404)
+
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], max_age=31536000)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Применяет недостающие миграции схемы (таблица schema_version)."""
+    applied = migrations.migrate_database()
+    for version, description in applied:
+        print(f"Применена миграция {version}: {description}")
+    print(f"Схема базы в актуальной версии {migrations.LATEST_VERSION}")
+
+@app.cli.command('copy-sqlite')
+@click.argument('path', default='users.db')
+def copy_sqlite_command(path):
+    """Переносит пользователей и профили из файла SQLite в PostgreSQL (DATABASE_URL)."""
+    copied = migrations.copy_from_sqlite(path)
+    for table, count in copied.items():
+        print(f"{table}: перенесено строк {count}")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Собирает CSS/JS бандлы с хэшем содержимого и сжатыми копиями в static/dist."""
+    manifest = assets.build()
+    print(f"Собрано бандлов: {len(manifest)}")
+
+# Метрики воркера в формате Prometheus. Каждый воркер gunicorn отдает свои
+# значения (метка pid); при заданном METRICS_TOKEN нужен заголовок Authorization.
+@app.route('/metrics')
+def metrics_endpoint():
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(403)
+
+    gauges = []
+    for name, value in db.get_pool().stats().items():
+        gauges.append((f'db_pool_{name}', value))
+    for name, value in page_cache.pages.stats().items():
+        gauges.append((f'page_cache_{name}', value))
+    for name, value in user_cache.users.stats().items():
+        gauges.append((f'user_cache_{name}', value))
+    for name, value in pdf_export.queue.stats().items():
+        gauges.append((f'pdf_queue_{name}', value))
+    for name, value in passwords.hasher.stats().items():
+        if name != 'method':
+            gauges.append((f'password_hasher_{name}', value))
+    for name, value in suggest.suggestions.stats().items():
+        gauges.append((f'suggest_{name}', value))
+    gauges.append(('http_request_io_wait_ratio', round(metrics.registry.io_wait_ratio(), 4)))
+
+    return Response(metrics.registry.render(gauges), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/logout')
 def logout():
@@ -486,6 +765,7 @@ def logout():
     return redirect('/login')
 
 if __name__ == '__main__':
-    create_tables()
+    # При локальном запуске схема обновляется сама; под gunicorn - командой migrate-db
+    migrations.migrate_database()
     port = int(os.environ.get('PORT', 5555))
     app.run(debug=True, host='0.0.0.0', port=port)
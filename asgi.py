@@ -0,0 +1,11 @@
+# Точка входа профиля async (GUNICORN_PROFILE=async, воркер uvicorn). Соединения
+# обслуживает цикл событий, а Flask-приложение выполняется в пуле потоков адаптера
+# a2wsgi: SQLite/psycopg, Pillow и хэширование паролей блокируют поток пула,
+# а не цикл событий.
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app
+
+app = WSGIMiddleware(flask_app, workers=int(os.environ.get('GUNICORN_THREADS', '4')))
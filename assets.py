@@ -0,0 +1,140 @@
+# Статические бандлы: CSS и JS страниц собираются в static/dist с хэшем
+# содержимого в имени и заранее сжатыми копиями (.gz, .br), поэтому
+# браузер может кэшировать их навсегда. Сборка: flask --app app build-assets
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:
+    # Без пакета Brotli отдаются только gzip-копии
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Имя бандла -> исходные файлы из static в порядке склейки
+BUNDLES = {
+    'css/style.css': ['css/style.css'],
+    'css/admin.css': ['css/admin.css'],
+    'css/create_portfolio.css': ['css/create_portfolio.css'],
+    'css/resume.css': ['css/resume.css'],
+    'css/view_portfolio.css': ['css/view_portfolio.css'],
+    'css/welcome.css': ['css/welcome.css'],
+    'js/admin.js': ['js/admin.js'],
+    'js/create_portfolio.js': ['js/create_portfolio.js'],
+    'js/edit_user.js': ['js/edit_user.js'],
+    'js/resume.js': ['js/resume.js'],
+    'js/user.js': ['js/user.js'],
+    'js/view_portfolio.js': ['js/view_portfolio.js'],
+}
+
+# Кодировка в Accept-Encoding -> расширение заранее сжатой копии
+ENCODINGS = {'br': '.br', 'gzip': '.gz'} if brotli is not None else {'gzip': '.gz'}
+
+_lock = threading.Lock()
+_manifest = None
+_build_id = None
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _fingerprinted(name, data):
+    base, ext = os.path.splitext(name)
+    return f'{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def build():
+    """Собирает бандлы в static/dist и записывает манифест имя -> файл."""
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(STATIC_DIR, source), 'rb') as f:
+                parts.append(f.read())
+        data = b'\n'.join(parts)
+        filename = _fingerprinted(name, data)
+        path = os.path.join(DIST_DIR, filename)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+            _write_atomic(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(path + '.br', brotli.compress(data, quality=11))
+        manifest[name] = filename
+
+    # Файлы прежних сборок больше не нужны
+    keep = {os.path.join(DIST_DIR, f) + ext for f in manifest.values() for ext in ('', '.gz', '.br')}
+    for directory, _, names in os.walk(DIST_DIR):
+        for file_name in names:
+            path = os.path.join(directory, file_name)
+            if path not in keep and path != MANIFEST_PATH:
+                os.remove(path)
+
+    _write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _sources_changed():
+    try:
+        built = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return True
+    return any(os.path.getmtime(os.path.join(STATIC_DIR, source)) > built
+               for sources in BUNDLES.values() for source in sources)
+
+
+def get_manifest(check_sources=False):
+    """Манифест сборки; без сборки (локальный запуск) бандлы собираются при первом обращении.
+
+    check_sources - пересобрать, если исходники изменились (режим отладки).
+    """
+    global _manifest
+    if _manifest is not None and not check_sources:
+        return _manifest
+    with _lock:
+        if _manifest is None or check_sources:
+            if _sources_changed():
+                _manifest = build()
+            elif _manifest is None:
+                with open(MANIFEST_PATH, encoding='utf-8') as f:
+                    _manifest = json.load(f)
+        return _manifest
+
+
+def build_id():
+    """Короткий хэш манифеста: меняется вместе с любым бандлом.
+
+    Входит в ETag страниц профиля (личных и публичных): после деплоя браузер
+    и прокси не должны получить 304 на HTML со ссылками на удаленные бандлы.
+    """
+    global _build_id
+    manifest = get_manifest()
+    if _build_id is None or _build_id[0] is not manifest:
+        digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:12]
+        _build_id = (manifest, digest)
+    return _build_id[1]
+
+
+def resolve(filename, accept_encodings):
+    """Путь к файлу бандла и кодировка ответа с учетом Accept-Encoding.
+
+    Отдаются только файлы из манифеста, произвольные пути из URL не читаются.
+    """
+    if filename not in get_manifest().values():
+        return None, None
+    path = os.path.join(DIST_DIR, filename)
+    available = [e for e, ext in ENCODINGS.items() if os.path.exists(path + ext)]
+    encoding = accept_encodings.best_match(available) if available else None
+    if encoding is not None:
+        return path + ENCODINGS[encoding], encoding
+    return path, None
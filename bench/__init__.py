@@ -0,0 +1,2 @@
+# Нагрузочные тесты полного сценария: регистрация -> портфолио -> резюме.
+# Запуск: python -m bench.run --help
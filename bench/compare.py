@@ -0,0 +1,58 @@
+# Сравнение двух прогонов bench.run: код выхода 1, если p95 какого-либо маршрута
+# вырос больше допустимого или появились ошибки.
+#
+#   python -m bench.compare before.json after.json --threshold 20
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold, metric='p95_ms', min_ms=1.0):
+    """Список строк отчета и признак регрессии.
+
+    Маршруты быстрее min_ms не считаются регрессией: на таких временах
+    разброс между прогонами больше самого изменения.
+    """
+    lines = []
+    regressed = False
+    for route in sorted(set(baseline['routes']) | set(current['routes'])):
+        before = baseline['routes'].get(route)
+        after = current['routes'].get(route)
+        if before is None or after is None:
+            lines.append(f"{route:<18}{'только в одном прогоне':>40}")
+            continue
+        change = (after[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+        mark = ''
+        if change > threshold and after[metric] >= min_ms:
+            mark = '  РЕГРЕССИЯ'
+            regressed = True
+        if after['errors'] > before['errors']:
+            mark += '  ОШИБКИ'
+            regressed = True
+        lines.append(f"{route:<18}{before[metric]:>12.3f}{after[metric]:>12.3f}{change:>+10.1f}%{mark}")
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Сравнение результатов bench.run')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=20.0, help='допустимый рост, %%')
+    parser.add_argument('--metric', default='p95_ms', choices=('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'))
+    args = parser.parse_args(argv)
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+    lines, regressed = compare(baseline, current, args.threshold, args.metric)
+    print(f"{'маршрут':<18}{'было':>12}{'стало':>12}{'изм.':>11}   ({args.metric})")
+    print('\n'.join(lines))
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# Пропускная способность /login при разной стоимости хэша пароля.
+# Для каждого метода создаются пользователи с хэшем этого метода, после чего
+# параллельные клиенты выполняют вход; отказы перегруженного пула (503) считаются ошибками.
+#
+#   python -m bench.login --methods pbkdf2:sha256:600000,scrypt:16384:8:1,scrypt:32768:8:1
+#   python -m bench.login --mode gunicorn --concurrency 32 --out login.json
+import argparse
+import os
+import platform
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from bench.run import (HttpClient, InProcessClient, Recorder, git_revision, prepare_workdir,
+                       start_gunicorn, summarize, write_results)
+
+DEFAULT_METHODS = 'pbkdf2:sha256:600000,scrypt:16384:8:1,scrypt:32768:8:1'
+PASSWORD = 'password123'
+
+
+def create_users(method_index, method, count):
+    from werkzeug.security import generate_password_hash
+
+    import db
+
+    password_hash = generate_password_hash(PASSWORD, method)
+    usernames = [f'login_{method_index}_{i}' for i in range(count)]
+    connection = db.connect()
+    with connection:
+        connection.executemany('INSERT INTO users (username, password) VALUES (?, ?)',
+                               [(username, password_hash) for username in usernames])
+    connection.close()
+    return usernames
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Пропускная способность входа по стоимости хэша')
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn'), default='inprocess')
+    parser.add_argument('--methods', default=DEFAULT_METHODS, help='методы werkzeug через запятую')
+    parser.add_argument('--logins', type=int, default=200, help='входов на каждый метод')
+    parser.add_argument('--users', type=int, default=50, help='пользователей на каждый метод')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--gunicorn-arg', action='append', default=[])
+    parser.add_argument('--out', default='bench_login.json')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = prepare_workdir(args.concurrency)
+
+    import app
+    import migrations
+    import passwords
+
+    migrations.migrate_database()
+    routes = {}
+    try:
+        for index, method in enumerate(args.methods.split(',')):
+            usernames = create_users(index, method, args.users)
+            process = None
+            try:
+                if args.mode == 'gunicorn':
+                    env = dict(os.environ, PASSWORD_HASH_METHOD=method)
+                    process, base_url = start_gunicorn(env, args.gunicorn_arg)
+                    make_client = lambda: HttpClient(base_url)
+                else:
+                    passwords.hasher = passwords.Hasher(method=method)
+                    make_client = lambda: InProcessClient(app.app)
+
+                recorder = Recorder()
+
+                def login(i):
+                    form = {'username': usernames[i % len(usernames)], 'password': PASSWORD}
+                    recorder.call(make_client(), f'login[{method}]', 'POST', '/login', form, expect=(302,))
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                    list(executor.map(login, range(args.logins)))
+                routes.update(summarize(recorder, time.perf_counter() - started))
+            finally:
+                if process is not None:
+                    process.terminate()
+                    process.wait(timeout=30)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+        'hash_workers': passwords.HASH_WORKERS,
+        'hash_queue_limit': passwords.HASH_QUEUE_LIMIT,
+        'total_requests': sum(r['requests'] for r in routes.values()),
+        'total_errors': sum(r['errors'] for r in routes.values()),
+        'routes': routes,
+    }
+    write_results(args.out, result, routes)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# Сравнение профилей gunicorn (sync, gthread, async) на одном сценарии bench.run.
+# Каждый профиль запускается отдельным процессом: конфиг и приложение читают
+# окружение при импорте. Лучшим считается профиль без ошибок с наибольшей
+# пропускной способностью на МБ памяти.
+#
+#   python -m bench.profiles --users 1000 --flow-users 100 --concurrency 32
+#   python -m bench.profiles --io-wait 0.7 -- --database-url postgresql://localhost/artistcard
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench.compare import load
+
+PROFILES = ('sync', 'gthread', 'async')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Сравнение профилей gunicorn')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--flow-users', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--io-wait', type=float,
+                        help='GUNICORN_IO_WAIT для расчета воркеров и потоков; по умолчанию из окружения')
+    parser.add_argument('--out', default='bench_profiles.json')
+    parser.add_argument('run_args', nargs='*', help='дополнительные аргументы bench.run после --')
+    return parser.parse_args(argv)
+
+
+def run_profile(profile, args, out):
+    env = dict(os.environ, GUNICORN_PROFILE=profile)
+    if args.io_wait is not None:
+        env['GUNICORN_IO_WAIT'] = str(args.io_wait)
+    # Рассчитанные для прошлого профиля значения не должны перейти в следующий
+    env.pop('GUNICORN_THREADS', None)
+    command = [sys.executable, '-m', 'bench.run', '--mode', 'gunicorn', '--profile', profile,
+               '--users', str(args.users), '--flow-users', str(args.flow_users),
+               '--concurrency', str(args.concurrency), '--out', out, *args.run_args]
+    subprocess.run(command, env=env, check=False)
+    return load(out) if os.path.exists(out) else None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='artistcard-profiles-') as tmp:
+        for profile in args.profiles.split(','):
+            print(f"=== Профиль {profile}")
+            results[profile] = run_profile(profile, args, os.path.join(tmp, f'{profile}.json'))
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(f"{'профиль':<10}{'воркеры':>9}{'потоки':>8}{'ошибок':>8}{'rps':>9}{'макс p95':>10}"
+          f"{'память МБ':>11}{'rps/МБ':>9}{'I/O':>7}")
+    best = None
+    for profile, result in results.items():
+        if result is None:
+            print(f"{profile:<10}{'прогон не выполнен':>40}")
+            continue
+        server = result['server']
+        p95 = max(r['p95_ms'] for r in result['routes'].values())
+        print(f"{profile:<10}{server['workers']:>9}{server['threads']:>8}{result['total_errors']:>8}"
+              f"{result['throughput_rps']:>9}{p95:>10}{result['memory_mb'] or '-':>11}"
+              f"{result['rps_per_mb'] or '-':>9}{result['io_wait_ratio'] or '-':>7}")
+        if result['total_errors'] == 0 and result['rps_per_mb'] and (
+                best is None or result['rps_per_mb'] > results[best]['rps_per_mb']):
+            best = profile
+    if best is None:
+        print("Ни один профиль не прошел сценарий без ошибок")
+        return 1
+    print(f"Лучшая пропускная способность на МБ: GUNICORN_PROFILE={best}. Результаты записаны в {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,407 @@
+# Нагрузочный прогон сценария register -> login -> save_portfolio -> admin ->
+# view_portfolio -> generate_resume. Приложение вызывается либо в процессе через
+# тестовый клиент Flask, либо по HTTP у локально запущенного gunicorn.
+#
+#   python -m bench.run --mode inprocess --users 2000 --flow-users 50 --out before.json
+#   python -m bench.run --mode gunicorn --concurrency 16 --out gunicorn.json
+#   python -m bench.run --mode gunicorn --instances 2 --database-url postgresql://localhost/artistcard
+#   python -m bench.run --mode gunicorn --profile async --out async.json
+#   python -m bench.compare before.json after.json
+import argparse
+import http.cookiejar
+import itertools
+import json
+import os
+import platform
+import re
+import runpy
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_PASSWORD = os.environ.get('BENCH_ADMIN_PASSWORD', 'admin123')
+GUNICORN_CONFIG = os.path.join(ROOT, 'gunicoorn_config.py')
+
+
+class InProcessClient:
+    """Сессия пользователя через тестовый клиент Flask."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self._client.open(path, method=method, data=data)
+        body = response.get_data()
+        return response.status_code, len(body)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """Сессия пользователя по HTTP; редиректы не выполняются, как и в тестовом клиенте."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data, doseq=True).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self._opener.open(req, timeout=60) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+
+    def call(self, client, route, method, path, data=None, expect=(200, 302)):
+        started = time.perf_counter()
+        try:
+            status, size = client.request(method, path, data)
+        except Exception:
+            status, size = None, 0
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            self.bytes[route] += size
+            if status not in expect:
+                self.errors[route] += 1
+        return status
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, wall_time):
+    routes = {}
+    for route, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        routes[route] = {
+            'requests': len(values),
+            'errors': recorder.errors[route],
+            'throughput_rps': round(len(values) / wall_time, 2) if wall_time else None,
+            'mean_ms': round(sum(values) / len(values) * 1000, 3),
+            'p50_ms': round(percentile(values, 50) * 1000, 3),
+            'p95_ms': round(percentile(values, 95) * 1000, 3),
+            'p99_ms': round(percentile(values, 99) * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3),
+            'bytes_avg': recorder.bytes[route] // len(values),
+        }
+    return routes
+
+
+def user_flow(make_client, recorder, index, args, photo_data):
+    """Полный путь одного пользователя; публикацию выполняет администратор."""
+    from bench.seed import profile_form
+
+    client = make_client()
+    admin = make_client()
+    username = f'bench_{os.getpid()}_{index}'
+    password = 'password123'
+
+    recorder.call(client, 'register', 'POST', '/register',
+                  {'username': username, 'password': password, 'confirm_password': password})
+    recorder.call(client, 'login', 'POST', '/login', {'username': username, 'password': password})
+    recorder.call(client, 'user', 'GET', '/user')
+    recorder.call(client, 'create_portfolio', 'GET', '/user/create_portfolio')
+    recorder.call(client, 'save_portfolio', 'POST', '/user/save_portfolio',
+                  profile_form(index, photo_data, args.experience))
+
+    recorder.call(admin, 'login', 'POST', '/login', {'username': 'admin', 'password': ADMIN_PASSWORD})
+    recorder.call(admin, 'admin', 'GET', '/admin')
+    recorder.call(admin, 'admin_search', 'GET', '/admin?q=' + urllib.parse.quote(username))
+    user_id = _find_user_id(admin, username)
+    if user_id:
+        form = profile_form(index, experience=args.experience)
+        recorder.call(admin, 'edit_user', 'POST', f'/admin/edit_user/{user_id}',
+                      {k: v for k, v in form.items() if not k.endswith('[]') and k != 'photo_data'})
+
+    for _ in range(args.repeat):
+        recorder.call(client, 'view_portfolio', 'GET', '/user/view_portfolio', expect=(200,))
+        recorder.call(client, 'generate_resume', 'GET', '/user/generate_resume', expect=(200,))
+
+
+def _find_user_id(admin, username):
+    # Идентификатор нового пользователя берем из базы, а не парсингом HTML
+    import db
+
+    connection = db.connect()
+    try:
+        row = connection.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()
+        return row['id'] if row else None
+    finally:
+        connection.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(env, extra_args=()):
+    port = _free_port()
+    # Модуль приложения (app:app или asgi:app) выбирает профиль в конфиге
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', GUNICORN_CONFIG,
+         '--bind', f'127.0.0.1:{port}', *extra_args],
+        cwd=ROOT, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/login', timeout=1).read()
+            return process, base_url
+        except Exception:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn завершился при запуске')
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn не ответил за 30 секунд')
+
+
+def server_settings():
+    """Профиль, воркеры и потоки, которые рассчитает gunicoorn_config.py в этом окружении."""
+    config = runpy.run_path(GUNICORN_CONFIG)
+    return {
+        'profile': config['PROFILE'],
+        'worker_class': config['worker_class'],
+        'workers': config['workers'],
+        'threads': config['app_threads'],
+        'cpus': config['cpus'],
+        'io_wait': config['IO_WAIT'],
+        'preload_app': config['preload_app'],
+        'max_requests': config['max_requests'],
+    }
+
+
+def _process_tree(root_pid):
+    pids = [root_pid]
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # Поле 4 - родительский процесс; имя процесса (2) в скобках может содержать пробелы
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == root_pid:
+            pids.append(int(name))
+    return pids
+
+
+def memory_mb(root_pid):
+    """Память мастера gunicorn и воркеров, МБ; None вне Linux.
+
+    Считается PSS: страницы, общие после fork (preload_app), делятся между
+    процессами, а не учитываются у каждого воркера целиком.
+    """
+    if not os.path.isdir('/proc'):
+        return None
+    total_kb = 0
+    for pid in _process_tree(root_pid):
+        for path, field in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+            try:
+                with open(path) as f:
+                    value = next((line.split()[1] for line in f if line.startswith(field)), None)
+            except OSError:
+                continue
+            if value is not None:
+                total_kb += int(value)
+                break
+    return round(total_kb / 1024, 1)
+
+
+_COUNTER_RE = re.compile(r'^(http_request_seconds_total|http_request_cpu_seconds_total)\{pid="(\d+)"\} ([\d.]+)$', re.M)
+
+
+def scrape_io_wait(base_urls, attempts=20):
+    """Доля ожидания I/O по счетчикам /metrics всех воркеров, которые ответили.
+
+    Каждый запрос попадает к случайному воркеру, поэтому опрашиваем несколько раз.
+    """
+    totals = {}
+    token = os.environ.get('METRICS_TOKEN')
+    for i in range(attempts):
+        req = urllib.request.Request(base_urls[i % len(base_urls)] + '/metrics')
+        if token:
+            req.add_header('Authorization', f'Bearer {token}')
+        try:
+            with urllib.request.urlopen(req, timeout=10) as response:
+                text = response.read().decode()
+        except Exception:
+            continue
+        for name, pid, value in _COUNTER_RE.findall(text):
+            totals[(base_urls[i % len(base_urls)], pid, name)] = float(value)
+    seconds = sum(v for (_, _, name), v in totals.items() if name == 'http_request_seconds_total')
+    cpu = sum(v for (_, _, name), v in totals.items() if name == 'http_request_cpu_seconds_total')
+    return round(max(0.0, 1 - cpu / seconds), 4) if seconds else None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон ArtistCard')
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn'), default='inprocess')
+    parser.add_argument('--users', type=int, default=1000, help='пользователей в базе до прогона')
+    parser.add_argument('--profile-ratio', type=float, default=0.7, help='доля пользователей с профилем')
+    parser.add_argument('--photo-kb', type=int, default=150, help='размер фотографии профиля')
+    parser.add_argument('--experience', type=int, default=3, help='мест работы в профиле')
+    parser.add_argument('--flow-users', type=int, default=50, help='пользователей, проходящих сценарий')
+    parser.add_argument('--repeat', type=int, default=5, help='просмотров портфолио и резюме на пользователя')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--gunicorn-arg', action='append', default=[],
+                        help='дополнительный аргумент gunicorn, например --gunicorn-arg=--workers=4')
+    parser.add_argument('--profile', choices=('sync', 'gthread', 'async'),
+                        help='профиль gunicoorn_config.py (GUNICORN_PROFILE), по умолчанию из окружения')
+    parser.add_argument('--instances', type=int, default=1,
+                        help='экземпляров gunicorn с общей базой, запросы распределяются по кругу')
+    parser.add_argument('--database-url',
+                        help='общая база PostgreSQL вместо временной SQLite; прогон добавляет в нее пользователей')
+    parser.add_argument('--keep-data', action='store_true', help='не удалять временную базу')
+    parser.add_argument('--out', default='bench_results.json')
+    return parser.parse_args(argv)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def prepare_workdir(concurrency, database_url=None):
+    """Временный каталог для базы, фотографий и PDF прогона."""
+    workdir = tempfile.mkdtemp(prefix='artistcard-bench-')
+    # Переменные окружения задаются до импорта приложения: пути читаются при импорте
+    os.environ['DATABASE_URL'] = database_url or 'sqlite:///' + os.path.join(workdir, 'users.db')
+    os.environ['PHOTO_STORE_DIR'] = os.path.join(workdir, 'photo_store')
+    os.environ['PDF_CACHE_DIR'] = os.path.join(workdir, 'pdf_cache')
+    # В режиме inprocess потоки прогона играют роль потоков одного воркера
+    os.environ.setdefault('DB_POOL_SIZE', str(concurrency))
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    return workdir
+
+
+def write_results(path, result, routes):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    width = max([18] + [len(route) + 2 for route in routes])
+    print(f"{'маршрут':<{width}}{'запросов':>10}{'ошибок':>8}{'rps':>10}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}")
+    for route, r in routes.items():
+        print(f"{route:<{width}}{r['requests']:>10}{r['errors']:>8}{r['throughput_rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+    print(f"Результаты записаны в {path}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = prepare_workdir(args.concurrency, args.database_url)
+
+    from bench.seed import make_photo, seed
+
+    seed_started = time.perf_counter()
+    seed(args.users, args.profile_ratio, args.photo_kb, args.experience)
+    seed_time = time.perf_counter() - seed_started
+    photo_data = make_photo(args.photo_kb, seed=1) if args.photo_kb else ''
+
+    processes = []
+    base_urls = []
+    server = None
+    memory = None
+    try:
+        if args.mode == 'gunicorn':
+            if args.profile:
+                os.environ['GUNICORN_PROFILE'] = args.profile
+            server = server_settings()
+            for _ in range(args.instances):
+                process, base_url = start_gunicorn(dict(os.environ), args.gunicorn_arg)
+                processes.append(process)
+                base_urls.append(base_url)
+            # Клиенты распределяются по экземплярам по кругу; cookie сессии подписана
+            # общим SECRET_KEY и принимается любым из них
+            next_url = itertools.cycle(base_urls).__next__
+            make_client = lambda: HttpClient(next_url())
+        else:
+            import app
+            make_client = lambda: InProcessClient(app.app)
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [executor.submit(user_flow, make_client, recorder, i, args, photo_data)
+                       for i in range(args.flow_users)]
+            for future in futures:
+                future.result()
+        wall_time = time.perf_counter() - started
+
+        if processes:
+            io_wait = scrape_io_wait(base_urls)
+            memory = sum(memory_mb(process.pid) or 0 for process in processes) or None
+        else:
+            import metrics
+            io_wait = round(metrics.registry.io_wait_ratio(), 4)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+        if not args.keep_data:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    routes = summarize(recorder, wall_time)
+    total_requests = sum(r['requests'] for r in routes.values())
+    throughput = round(total_requests / wall_time, 2) if wall_time else 0.0
+    result = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+        'seed_seconds': round(seed_time, 3),
+        'wall_seconds': round(wall_time, 3),
+        'total_requests': total_requests,
+        'total_errors': sum(r['errors'] for r in routes.values()),
+        'throughput_rps': throughput,
+        'server': server,
+        'memory_mb': memory,
+        'rps_per_mb': round(throughput / memory, 4) if memory else None,
+        # Подставляется в GUNICORN_IO_WAIT для расчета потоков
+        'io_wait_ratio': io_wait,
+        'routes': routes,
+    }
+    write_results(args.out, result, routes)
+    print(f"Всего {throughput} запросов/с, память {memory} МБ, ожидание I/O {io_wait}")
+    return 1 if result['total_errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# Наполнение тестовой базы: пользователи, профили, фотографии и опыт работы.
+import base64
+import io
+import math
+import os
+import random
+
+from PIL import Image
+
+
+def make_photo(size_kb, seed=0):
+    """JPEG примерно заданного размера в виде data URL, как его шлет форма."""
+    rng = random.Random(seed)
+    side = max(16, int(math.sqrt(size_kb * 1024 / 1.2)))
+    noise = bytes(rng.getrandbits(8) for _ in range(side * side * 3))
+    image = Image.frombytes('RGB', (side, side), noise)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def profile_form(index, photo_data='', experience=3):
+    """Данные формы save_portfolio для пользователя с номером index."""
+    form = {
+        'full_name': f'Тестовый Пользователь {index}',
+        'birth_date': '1995-05-17',
+        'email': f'user{index}@example.com',
+        'phone': '+79990000000',
+        'bio': 'Разработчик. ' * 20,
+        'skills': 'Python, Flask, SQL, Docker, Linux',
+        'job_position': 'Backend-разработчик',
+        'salary_expectations': '150000',
+        'education': 'Московский государственный университет, 2017, Прикладная математика',
+        'courses': 'Курс по Python',
+        'certificates': 'Сертификат SQL',
+        'github': f'https://github.com/user{index}',
+        'linkedin': '', 'vk': '', 'telegram': '', 'portfolio_link': '',
+        'photo_data': photo_data,
+        'company[]': [], 'position[]': [], 'start_date[]': [], 'end_date[]': [],
+        'responsibilities[]': [],
+        'language[]': ['Английский', 'Немецкий'],
+        'language_level[]': ['B2', 'A2'],
+    }
+    for i in range(experience):
+        form['company[]'].append(f'Компания {i}')
+        form['position[]'].append('Разработчик')
+        form['start_date[]'].append(f'{2015 + i}-01')
+        form['end_date[]'].append(f'{2016 + i}-01' if i < experience - 1 else '')
+        form['responsibilities[]'].append('Разработка и поддержка сервисов. ' * 5)
+    return form
+
+
+def seed(users, profile_ratio=0.7, photo_kb=150, experience=3, password='password', method=None):
+    """Заполняет базу из DATABASE_URL напрямую через SQL.
+
+    Треть профилей остается на проверке, остальные публикуются.
+    Возвращает имена созданных пользователей.
+    """
+    from werkzeug.security import generate_password_hash
+
+    import db
+    import migrations
+    import passwords
+    import photos
+    import profiles
+
+    migrations.migrate_database()
+    # Один хэш на всех: вычислять KDF для каждого пользователя слишком долго
+    password_hash = generate_password_hash(password, method or passwords.PASSWORD_HASH_METHOD)
+    photo_hash = photos.save_photo(photos.decode_data_url(make_photo(photo_kb))) if photo_kb else None
+
+    connection = db.connect()
+    usernames = []
+    with connection:
+        for i in range(users):
+            username = f'seed_{os.getpid()}_{i}'
+            user_id = profiles.create_user(connection, username, password_hash)
+            usernames.append(username)
+            if i >= users * profile_ratio:
+                continue
+            form = profile_form(i, experience=experience)
+            fields = {name: form[name] for name in profiles.FORM_FIELDS if name in form}
+            fields['photo'] = photo_hash
+            profiles.upsert_profile(connection, user_id, fields, is_completed=i % 3 != 0)
+            profiles.replace_experience(connection, user_id, [
+                profiles.ExperienceEntry(*entry) for entry in zip(
+                    form['company[]'], form['position[]'], form['start_date[]'],
+                    form['end_date[]'], form['responsibilities[]'])
+            ])
+            profiles.replace_languages(connection, user_id, [
+                profiles.LanguageEntry(*entry) for entry in zip(form['language[]'], form['language_level[]'])
+            ])
+    connection.close()
+    return usernames
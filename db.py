@@ -0,0 +1,269 @@
+# Хранилище выбирается при запуске по DATABASE_URL: sqlite:///путь (по умолчанию)
+# или postgresql://... (db_postgres.py). Для SQLite здесь же пул соединений на
+# процесс (воркер gunicorn), WAL-журнал и PRAGMA, чтобы запись не блокировала чтение.
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import g
+
+
+DATABASE_URL = os.environ.get('DATABASE_URL', '')
+BACKEND = 'postgresql' if DATABASE_URL.startswith(('postgres://', 'postgresql://')) else 'sqlite'
+
+
+def _database_path():
+    # DATABASE_URL вида sqlite:///users.db задает путь к файлу базы
+    if DATABASE_URL.startswith('sqlite:///'):
+        return DATABASE_URL[len('sqlite:///'):]
+    return os.environ.get('DATABASE_PATH', 'users.db')
+
+
+DATABASE_PATH = _database_path()
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', os.environ.get('GUNICORN_THREADS', '4')))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', '5000'))
+
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA mmap_size = 134217728',
+    'PRAGMA temp_store = MEMORY',
+    f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}',
+)
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Все соединения пула заняты дольше POOL_TIMEOUT секунд."""
+
+
+# Наблюдатели за запросами: callback(sql, seconds) после каждого execute
+_query_observers = []
+
+
+def on_query(callback):
+    _query_observers.append(callback)
+
+
+def notify_query(sql, started):
+    if _query_observers:
+        elapsed = time.perf_counter() - started
+        for callback in _query_observers:
+            callback(sql, elapsed)
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            notify_query(sql, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            notify_query(sql, started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            notify_query(sql_script, started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Соединение, все запросы которого проходят через TimedCursor."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def stream(self, sql, parameters=()):
+        # Курсор SQLite и так читает строки по мере выборки
+        return self.execute(sql, parameters)
+
+
+def connect(path=None):
+    """Открывает новое соединение с примененными PRAGMA."""
+    if BACKEND == 'postgresql' and path is None:
+        return db_postgres.connect(DATABASE_URL)
+    conn = sqlite3.connect(path or DATABASE_PATH, timeout=BUSY_TIMEOUT_MS / 1000,
+                           check_same_thread=False, factory=TimedConnection)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path, size, timeout):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+
+    def acquire(self):
+        started = time.perf_counter()
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = connect(self.path)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout('Нет свободных соединений с базой данных')
+                with self._lock:
+                    self._waits += 1
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_time += waited
+        return conn
+
+    def release(self, conn):
+        try:
+            # Незавершенная транзакция не должна утечь к следующему запросу
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+                self._in_use -= 1
+            return
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = self._in_use
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': self._created - self._in_use,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': round(self._wait_time, 6),
+                'wait_time_avg': round(self._wait_time / self._checkouts, 6) if self._checkouts else 0.0,
+                'timeouts': self._timeouts,
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Пул текущего процесса; после fork воркер получает собственный пул."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                if BACKEND == 'postgresql':
+                    _pool = db_postgres.ConnectionPool(DATABASE_URL, POOL_SIZE, POOL_TIMEOUT)
+                else:
+                    _pool = ConnectionPool(DATABASE_PATH, POOL_SIZE, POOL_TIMEOUT)
+                _pool_pid = pid
+    return _pool
+
+
+def close_pool():
+    """Закрывает пул текущего процесса: при выходе воркера gunicorn (worker_exit)
+    и при завершении процесса (atexit) для CLI-команд и bench."""
+    global _pool
+    with _pool_lock:
+        # Пул, унаследованный от мастера через fork, принадлежит мастеру
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_pool)
+
+
+def get_db():
+    """Соединение, закрепленное за текущим запросом.
+
+    Берется из пула при первом обращении и возвращается в teardown.
+    """
+    if 'db' not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+
+def release_db(exception=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(release_db)
+
+
+# Различия диалектов для запросов приложения. psycopg импортируется,
+# только если выбран PostgreSQL.
+if BACKEND == 'postgresql':
+    import db_postgres
+
+    IntegrityError = db_postgres.IntegrityError
+    PoolTimeout = db_postgres.PoolTimeout
+    NOW = db_postgres.NOW
+    LIKE = 'ILIKE'
+else:
+    IntegrityError = sqlite3.IntegrityError
+    NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+    LIKE = 'LIKE'
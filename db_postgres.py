@@ -0,0 +1,172 @@
+# Хранилище PostgreSQL: пул соединений psycopg с тем же интерфейсом, что и пул
+# SQLite в db.py. Запросы приложения пишутся с плейсхолдерами "?" и переводятся
+# в формат psycopg; каждый запрос готовится на сервере (prepared statement).
+import re
+import time
+
+import psycopg
+import psycopg_pool
+
+import db
+
+IntegrityError = psycopg.IntegrityError
+PoolTimeout = psycopg_pool.PoolTimeout
+
+# Текущее время UTC в формате updated_at (как strftime('%Y-%m-%d %H:%M:%f') в SQLite)
+NOW = "to_char(clock_timestamp() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS.MS')"
+
+# Документ полнотекстового поиска по профилю; то же выражение в индексе
+# idx_user_profiles_search (migrations.py), иначе планировщик его не использует
+SEARCH_VECTOR = ("to_tsvector('simple', COALESCE(full_name, '') || ' ' || "
+                 "COALESCE(skills, '') || ' ' || COALESCE(job_position, ''))")
+
+_STRING_RE = re.compile(r"('(?:[^']|'')*')")
+_translated = {}
+
+
+def translate(sql):
+    """"?" вне строковых литералов -> %s, литеральный % экранируется."""
+    query = _translated.get(sql)
+    if query is None:
+        parts = _STRING_RE.split(sql.replace('%', '%%'))
+        # Нечетные элементы - строковые литералы, их не трогаем
+        query = ''.join(part if i % 2 else part.replace('?', '%s') for i, part in enumerate(parts))
+        if len(_translated) < 2048:
+            _translated[sql] = query
+    return query
+
+
+class Row:
+    """Строка результата с доступом по индексу и по имени столбца, как sqlite3.Row."""
+
+    __slots__ = ('_values', '_index')
+
+    def __init__(self, values, index):
+        self._values = values
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._values[self._index[key]]
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def keys(self):
+        return list(self._index)
+
+    def __repr__(self):
+        return f'<Row {dict(zip(self._index, self._values))!r}>'
+
+
+def row_factory(cursor):
+    index = {column.name: i for i, column in enumerate(cursor.description or ())}
+    return lambda values: Row(values, index)
+
+
+class TimedCursor(psycopg.Cursor):
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(translate(query), params or (), **kwargs)
+        finally:
+            db.notify_query(query, started)
+
+    def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().executemany(translate(query), params_seq, **kwargs)
+        finally:
+            db.notify_query(query, started)
+
+
+class TimedServerCursor(psycopg.ServerCursor):
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(translate(query), params or (), **kwargs)
+        finally:
+            db.notify_query(query, started)
+
+
+class Connection(psycopg.Connection):
+    """Соединение с интерфейсом, которым приложение пользуется в sqlite3."""
+
+    @classmethod
+    def connect(cls, conninfo='', **kwargs):
+        conn = super().connect(conninfo, **kwargs)
+        conn.cursor_factory = TimedCursor
+        conn.server_cursor_factory = TimedServerCursor
+        conn.row_factory = row_factory
+        # Готовить каждый запрос с первого выполнения; psycopg хранит
+        # до prepared_max подготовленных запросов на соединение
+        conn.prepare_threshold = 0
+        return conn
+
+    def executemany(self, query, params_seq):
+        cursor = self.cursor()
+        cursor.executemany(query, params_seq)
+        return cursor
+
+    def stream(self, query, params=()):
+        """Курсор на стороне сервера: большие выборки читаются порциями."""
+        cursor = self.cursor(name=f'stream_{id(self)}_{time.monotonic_ns()}')
+        cursor.execute(query, params)
+        return cursor
+
+    @property
+    def in_transaction(self):
+        return self.info.transaction_status != psycopg.pq.TransactionStatus.IDLE
+
+
+def connect(url):
+    return Connection.connect(url)
+
+
+class ConnectionPool:
+    """Обертка над psycopg_pool.ConnectionPool со статистикой в формате пула SQLite."""
+
+    def __init__(self, url, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._pool = psycopg_pool.ConnectionPool(
+            url, min_size=1, max_size=size, timeout=timeout, open=True,
+            connection_class=Connection, check=psycopg_pool.ConnectionPool.check_connection,
+            name='artistcard')
+
+    def acquire(self):
+        return self._pool.getconn()
+
+    def release(self, conn):
+        # Незавершенная транзакция не должна утечь к следующему запросу
+        if not conn.closed and conn.in_transaction:
+            try:
+                conn.rollback()
+            except psycopg.Error:
+                pass
+        self._pool.putconn(conn)
+
+    def close(self):
+        self._pool.close()
+
+    def stats(self):
+        stats = self._pool.get_stats()
+        open_count = stats.get('pool_size', 0)
+        idle = stats.get('pool_available', 0)
+        checkouts = stats.get('requests_num', 0)
+        wait_time = stats.get('requests_wait_ms', 0) / 1000
+        return {
+            'size': self.size,
+            'open': open_count,
+            'in_use': open_count - idle,
+            'idle': idle,
+            'checkouts': checkouts,
+            'waits': stats.get('requests_queued', 0),
+            'wait_time_total': round(wait_time, 6),
+            'wait_time_avg': round(wait_time / checkouts, 6) if checkouts else 0.0,
+            'timeouts': stats.get('requests_errors', 0),
+        }
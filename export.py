@@ -0,0 +1,52 @@
+# Потоковая выгрузка профилей: строки читаются из курсора порциями и сразу
+# отдаются клиенту, вся выгрузка в памяти не собирается.
+import csv
+import io
+import json
+
+BATCH_SIZE = 500
+
+# Ячейка с такого символа в Excel становится формулой (=HYPERLINK(...), +cmd|...)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _rows(cursor):
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+        yield rows
+
+
+def _csv_cell(value):
+    # Значения вводят пользователи: апостроф заставляет Excel показать их текстом
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_stream(cursor, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM, чтобы Excel открыл кириллицу в UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(fields)
+    for rows in _rows(cursor):
+        writer.writerows([_csv_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def jsonl_stream(cursor, fields):
+    json_fields = {'experience', 'languages'}
+    for rows in _rows(cursor):
+        chunk = []
+        for row in rows:
+            record = dict(zip(fields, row))
+            for name in json_fields:
+                record[name] = json.loads(record[name]) if record.get(name) else []
+            chunk.append(json.dumps(record, ensure_ascii=False))
+        yield '\n'.join(chunk) + '\n'
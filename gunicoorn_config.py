@@ -1,8 +1,109 @@
 # gunicorn_config.py
+# Профили запуска (GUNICORN_PROFILE):
+#   sync    - один запрос на процесс; процессов столько, чтобы ядра не простаивали,
+#             пока запросы ждут базу и диск
+#   gthread - процесс на ядро, в нем потоки на время ожидания I/O (по умолчанию)
+#   async   - uvicorn: соединения обслуживает цикл событий, приложение выполняется
+#             в пуле потоков адаптера WSGI -> ASGI (asgi.py)
+# Воркеры и потоки считаются по доступным CPU и доле ожидания I/O в запросе
+# (GUNICORN_IO_WAIT; измеряется метрикой http_request_io_wait_ratio и bench.run).
+# GUNICORN_WORKERS / GUNICORN_THREADS задают их явно.
+import gc
+import math
 import os
 
-workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
-threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+PROFILE = os.environ.get('GUNICORN_PROFILE', 'gthread')
+IO_WAIT = min(max(float(os.environ.get('GUNICORN_IO_WAIT', '0.5')), 0.0), 0.95)
+# Верхняя граница по памяти: каждый воркер - отдельный процесс со своими кэшами
+MAX_WORKERS = int(os.environ.get('GUNICORN_MAX_WORKERS', '8'))
+MAX_THREADS = 32
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    # uvicorn.workers устарел, воркер вынесен в пакет uvicorn-worker
+    'async': 'uvicorn_worker.UvicornWorker',
+}
+if PROFILE not in WORKER_CLASSES:
+    raise RuntimeError(f'Неизвестный GUNICORN_PROFILE={PROFILE}, допустимо: {", ".join(WORKER_CLASSES)}')
+
+
+def available_cpus():
+    """Ядра, доступные процессу, с учетом привязки к CPU и квоты cgroup контейнера."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+def auto_size(profile, cpus, io_wait):
+    """(воркеры, потоки на воркер) для профиля."""
+    # Запрос занимает CPU (1 - io_wait) своего времени: одно ядро загружают
+    # 1 / (1 - io_wait) одновременных запросов
+    per_cpu = math.ceil(1 / (1 - io_wait))
+    if profile == 'sync':
+        # При io_wait = 0.5 получается привычное 2 * ядра + 1
+        return min(cpus * per_cpu + 1, MAX_WORKERS), 1
+    if profile == 'gthread':
+        # Поток gthread занят и на время чтения запроса от медленного клиента, отсюда запас
+        return min(max(cpus, 2), MAX_WORKERS), min(max(per_cpu * 2, 2), MAX_THREADS)
+    # async: медленных клиентов держит цикл событий, потоки нужны только приложению
+    return min(cpus, MAX_WORKERS), min(max(per_cpu, 2), MAX_THREADS)
+
+
+cpus = available_cpus()
+auto_workers, auto_threads = auto_size(PROFILE, cpus, IO_WAIT)
+workers = int(os.environ.get('GUNICORN_WORKERS', auto_workers))
+app_threads = 1 if PROFILE == 'sync' else int(os.environ.get('GUNICORN_THREADS', auto_threads))
+# По GUNICORN_THREADS воркер настраивает пул соединений с базой (db.POOL_SIZE)
+# и пул потоков адаптера ASGI; воркеры наследуют окружение мастера
+os.environ['GUNICORN_THREADS'] = str(app_threads)
+
+worker_class = WORKER_CLASSES[PROFILE]
+threads = app_threads if PROFILE == 'gthread' else 1
+wsgi_app = 'asgi:app' if PROFILE == 'async' else 'app:app'
+
 timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
 bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:10000')
-worker_class = 'sync'
\ No newline at end of file
+
+# Приложение загружается в мастере до fork: код и данные модулей у воркеров
+# общие (copy-on-write), а ошибка импорта видна сразу при запуске
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+# Перезапуск воркера после N запросов ограничивает рост памяти (кэши, фрагментация);
+# разброс не дает всем воркерам перезапуститься одновременно
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    server.log.info(f'Профиль {PROFILE}: CPU {cpus}, ожидание I/O {IO_WAIT:.2f}, '
+                    f'воркеров {workers}, потоков {app_threads}, preload {preload_app}')
+
+
+def pre_fork(server, worker):
+    # Объекты, загруженные в мастере, исключаются из сборки мусора: иначе обход
+    # сборщика в воркере записывает в их страницы и они перестают быть общими
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Схему обновляет flask --app app migrate-db при деплое; воркер только сверяет
+    # версию и при устаревшей схеме не запускается (gunicorn останавливается)
+    import migrations
+
+    migrations.check_database()
+
+
+def worker_exit(server, worker):
+    # Соединения с базой закрываются явно, пока потоки пула PostgreSQL еще живы
+    import db
+
+    db.close_pool()
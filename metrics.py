@@ -0,0 +1,185 @@
+# Метрики запросов в памяти воркера: время ответа, время и число SQL-запросов,
+# время рендера шаблонов и размер ответа по каждому маршруту, а также доля
+# времени запроса, которую поток ждал I/O (по ней подбираются потоки gunicorn).
+# Отдаются в текстовом формате Prometheus на /metrics.
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, has_app_context, has_request_context, request, template_rendered, before_render_template
+
+import db
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    # name -> (help, buckets)
+    HISTOGRAMS = {
+        'http_request_duration_seconds': ('Время обработки запроса', TIME_BUCKETS),
+        'http_request_sql_duration_seconds': ('Суммарное время SQL за запрос', TIME_BUCKETS),
+        'http_request_sql_queries': ('Число SQL-запросов за запрос', COUNT_BUCKETS),
+        'http_request_template_duration_seconds': ('Время рендера шаблонов за запрос', TIME_BUCKETS),
+        'http_response_size_bytes': ('Размер тела ответа', SIZE_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._requests = defaultdict(int)
+        self._slow_queries = 0
+        self._request_seconds = 0.0
+        self._request_cpu_seconds = 0.0
+
+    def observe(self, name, endpoint, value):
+        key = (name, endpoint)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.HISTOGRAMS[name][1])
+            histogram.observe(value)
+
+    def count_request(self, endpoint, method, status):
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+
+    def count_slow_query(self):
+        with self._lock:
+            self._slow_queries += 1
+
+    def observe_cpu(self, seconds, cpu_seconds):
+        with self._lock:
+            self._request_seconds += seconds
+            self._request_cpu_seconds += cpu_seconds
+
+    def io_wait_ratio(self):
+        """Доля времени запросов вне CPU потока: ожидание базы, диска, пулов.
+
+        Хэширование паролей и PDF идут в своих пулах потоков и тоже считаются ожиданием.
+        """
+        with self._lock:
+            if not self._request_seconds:
+                return 0.0
+            return max(0.0, 1 - self._request_cpu_seconds / self._request_seconds)
+
+    def render(self, gauges=()):
+        """Все метрики в текстовом формате Prometheus.
+
+        gauges - пары (имя, значение) из пула соединений, кэшей и т.п.
+        """
+        pid = os.getpid()
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_requests_total Число обработанных запросов')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), value in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{pid="{pid}",endpoint="{endpoint}",'
+                             f'method="{method}",status="{status}"}} {value}')
+
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, endpoint), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'pid="{pid}",endpoint="{endpoint}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+            lines.append('# HELP sql_slow_queries_total Запросы дольше SLOW_QUERY_MS')
+            lines.append('# TYPE sql_slow_queries_total counter')
+            lines.append(f'sql_slow_queries_total{{pid="{pid}"}} {self._slow_queries}')
+
+            lines.append('# HELP http_request_seconds_total Суммарное время обработки запросов')
+            lines.append('# TYPE http_request_seconds_total counter')
+            lines.append(f'http_request_seconds_total{{pid="{pid}"}} {self._request_seconds:.6f}')
+            lines.append('# HELP http_request_cpu_seconds_total Суммарное время CPU потоков запросов')
+            lines.append('# TYPE http_request_cpu_seconds_total counter')
+            lines.append(f'http_request_cpu_seconds_total{{pid="{pid}"}} {self._request_cpu_seconds:.6f}')
+
+        for name, value in gauges:
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name}{{pid="{pid}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _on_query(sql, seconds):
+    if has_app_context():
+        g.sql_time = g.get('sql_time', 0.0) + seconds
+        g.sql_count = g.get('sql_count', 0) + 1
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        registry.count_slow_query()
+        endpoint = request.endpoint if has_request_context() else None
+        print(f"Медленный запрос ({seconds * 1000:.1f} мс, {endpoint}): {' '.join(sql.split())}")
+
+
+def _before_render(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    started = g.pop('template_started', None)
+    if started is not None:
+        g.template_time = g.get('template_time', 0.0) + time.perf_counter() - started
+
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+    g.request_cpu_started = time.thread_time()
+
+
+def _record(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    endpoint = request.endpoint or 'unknown'
+    elapsed = time.perf_counter() - started
+    registry.count_request(endpoint, request.method, response.status_code)
+    registry.observe('http_request_duration_seconds', endpoint, elapsed)
+    registry.observe_cpu(elapsed, time.thread_time() - g.request_cpu_started)
+    registry.observe('http_request_sql_duration_seconds', endpoint, g.get('sql_time', 0.0))
+    registry.observe('http_request_sql_queries', endpoint, g.get('sql_count', 0))
+    registry.observe('http_request_template_duration_seconds', endpoint, g.get('template_time', 0.0))
+    # У потоковых ответов (выгрузки, файлы) размер заранее неизвестен
+    if response.content_length is not None:
+        registry.observe('http_response_size_bytes', endpoint, response.content_length)
+    return response
+
+
+def init_app(app):
+    db.on_query(_on_query)
+    app.before_request(_start_timer)
+    app.after_request(_record)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
@@ -0,0 +1,398 @@
+# Версионные миграции схемы. Недостающие шаги применяются одной транзакцией
+# командой flask --app app migrate-db при деплое; воркеры при запуске только
+# сверяют номер версии в schema_version. Новый шаг - новая функция с
+# декоратором @migration и следующим номером; примененные шаги не меняются.
+import os
+
+import db
+import passwords
+import photos
+import profiles
+
+MIGRATIONS = []
+
+# Ключ advisory-блокировки PostgreSQL: два экземпляра не мигрируют одновременно
+LOCK_KEY = 7_301_016
+
+
+class SchemaOutdated(RuntimeError):
+    """Схема базы старше, чем ожидает код."""
+
+
+def migration(version, description):
+    def register(step):
+        assert not MIGRATIONS or MIGRATIONS[-1][0] < version, 'номера миграций идут по возрастанию'
+        MIGRATIONS.append((version, description, step))
+        return step
+    return register
+
+
+def _id_column():
+    if db.BACKEND == 'postgresql':
+        return 'BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY'
+    return 'INTEGER PRIMARY KEY AUTOINCREMENT'
+
+
+def _columns(connection, table):
+    if db.BACKEND == 'postgresql':
+        rows = connection.execute(
+            'SELECT column_name FROM information_schema.columns '
+            'WHERE table_schema = current_schema() AND table_name = ?', (table,))
+        return {row[0] for row in rows}
+    return {row['name'] for row in connection.execute(f'PRAGMA table_info({table})')}
+
+
+def _table_exists(connection, table):
+    if db.BACKEND == 'postgresql':
+        return connection.execute('SELECT to_regclass(?) IS NOT NULL', (table,)).fetchone()[0]
+    return connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+@migration(1, 'Пользователи и профили')
+def create_users_and_profiles(connection):
+    connection.execute(f'''
+    CREATE TABLE IF NOT EXISTS users (
+        id {_id_column()},
+        username TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL
+    )
+    ''')
+    connection.execute(f'''
+    CREATE TABLE IF NOT EXISTS user_profiles (
+        id {_id_column()},
+        user_id BIGINT,
+        full_name TEXT,
+        birth_date TEXT,
+        email TEXT,
+        phone TEXT,
+        bio TEXT,
+        skills TEXT,
+        job_position TEXT,
+        salary_expectations TEXT,
+        education TEXT,
+        courses TEXT,
+        certificates TEXT,
+        github TEXT,
+        linkedin TEXT,
+        vk TEXT,
+        telegram TEXT,
+        portfolio_link TEXT,
+        photo TEXT,
+        experience TEXT,
+        languages TEXT,
+        is_completed BOOLEAN DEFAULT FALSE,
+        updated_at TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    # Версия профиля для кэша страниц; в базах до create_tables с updated_at столбца нет
+    if 'updated_at' not in _columns(connection, 'user_profiles'):
+        connection.execute('ALTER TABLE user_profiles ADD COLUMN updated_at TEXT')
+        connection.execute(f'UPDATE user_profiles SET updated_at = {db.NOW}')
+
+
+@migration(2, 'Опыт работы и языки отдельными таблицами')
+def create_experience_and_languages(connection):
+    # По строке на запись, в порядке заполнения формы
+    connection.execute(f'''
+    CREATE TABLE IF NOT EXISTS profile_experience (
+        id {_id_column()},
+        user_id BIGINT NOT NULL,
+        position_index INTEGER NOT NULL,
+        company TEXT,
+        position TEXT,
+        start_date TEXT,
+        end_date TEXT,
+        responsibilities TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    connection.execute(f'''
+    CREATE TABLE IF NOT EXISTS profile_languages (
+        id {_id_column()},
+        user_id BIGINT NOT NULL,
+        position_index INTEGER NOT NULL,
+        language TEXT,
+        level TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_profile_experience_user_id ON profile_experience (user_id, position_index)')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_profile_languages_user_id ON profile_languages (user_id, position_index)')
+
+
+@migration(3, 'Один профиль на пользователя, индекс по статусу публикации')
+def unique_profile_per_user(connection):
+    # Удаляем дубликаты, оставляя последний сохраненный профиль;
+    # на уникальном индексе держится UPSERT в profiles.upsert_profile
+    cursor = connection.execute('''
+    DELETE FROM user_profiles
+    WHERE user_id IS NOT NULL AND id NOT IN (
+        SELECT MAX(id) FROM user_profiles WHERE user_id IS NOT NULL GROUP BY user_id
+    )
+    ''')
+    if cursor.rowcount > 0:
+        print(f"Удалено дублирующихся профилей: {cursor.rowcount}")
+    connection.execute('DROP INDEX IF EXISTS idx_user_profiles_user_id')
+    connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_user_profiles_user_id ON user_profiles (user_id)')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_user_profiles_is_completed ON user_profiles (is_completed, user_id)')
+
+
+@migration(4, 'Полнотекстовый поиск по профилям')
+def profile_search(connection):
+    if db.BACKEND == 'postgresql':
+        import db_postgres
+
+        # Выражение индекса совпадает с условием поиска в profiles.list_user_summaries
+        connection.execute(f'CREATE INDEX IF NOT EXISTS idx_user_profiles_search '
+                           f'ON user_profiles USING GIN (({db_postgres.SEARCH_VECTOR}))')
+        return
+
+    connection.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS user_profiles_fts USING fts5(
+        full_name, skills, job_position,
+        content='user_profiles', content_rowid='id', tokenize='unicode61'
+    )
+    ''')
+    # По одному запросу: executescript завершил бы транзакцию миграции
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS user_profiles_fts_insert AFTER INSERT ON user_profiles BEGIN
+        INSERT INTO user_profiles_fts (rowid, full_name, skills, job_position)
+        VALUES (new.id, new.full_name, new.skills, new.job_position);
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS user_profiles_fts_delete AFTER DELETE ON user_profiles BEGIN
+        INSERT INTO user_profiles_fts (user_profiles_fts, rowid, full_name, skills, job_position)
+        VALUES ('delete', old.id, old.full_name, old.skills, old.job_position);
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS user_profiles_fts_update
+    AFTER UPDATE OF full_name, skills, job_position ON user_profiles BEGIN
+        INSERT INTO user_profiles_fts (user_profiles_fts, rowid, full_name, skills, job_position)
+        VALUES ('delete', old.id, old.full_name, old.skills, old.job_position);
+        INSERT INTO user_profiles_fts (rowid, full_name, skills, job_position)
+        VALUES (new.id, new.full_name, new.skills, new.job_position);
+    END
+    ''')
+    # Индексируем профили, созданные до появления поиска
+    connection.execute("INSERT INTO user_profiles_fts (user_profiles_fts) VALUES ('rebuild')")
+
+
+@migration(5, 'Администратор по умолчанию')
+def default_admin(connection):
+    if not connection.execute("SELECT id FROM users WHERE username = 'admin'").fetchone():
+        profiles.create_user(connection, 'admin', passwords.hasher.hash('admin123'))
+        print("Администратор создан: admin / admin123")
+
+
+@migration(6, 'Публичные ссылки на профили')
+def public_profile_slugs(connection):
+    connection.execute('ALTER TABLE user_profiles ADD COLUMN public_slug TEXT')
+    rows = connection.execute('SELECT id FROM user_profiles').fetchall()
+    if rows:
+        connection.executemany('UPDATE user_profiles SET public_slug = ? WHERE id = ?',
+                               [(profiles.new_public_slug(), row[0]) for row in rows])
+    connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_user_profiles_public_slug ON user_profiles (public_slug)')
+
+
+@migration(7, 'Ранг статуса пользователя для списка в админ-панели')
+def user_status_rank(connection):
+    connection.execute(f'ALTER TABLE users ADD COLUMN status_rank INTEGER NOT NULL DEFAULT {profiles.RANK_EMPTY}')
+    connection.execute(f'''
+    UPDATE users SET status_rank = COALESCE(
+        (SELECT CAST(is_completed AS INTEGER) FROM user_profiles WHERE user_id = users.id),
+        {profiles.RANK_EMPTY})
+    ''')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_users_status_rank ON users (status_rank, id)')
+
+
+@migration(8, 'Перенос опыта работы, языков и фотографий из текстовых столбцов')
+def convert_legacy_profile_data(connection):
+    # Страницы читают опыт работы и языки из дочерних таблиц, фотографии - из
+    # хранилища по хэшу; профили, сохраненные до этого, переносятся здесь
+    migrated = profiles.migrate_structured(connection)
+    if migrated:
+        print(f"Перенесено списков опыта работы и языков: {migrated}")
+    migrated, failed = photos.migrate_photos(connection)
+    if migrated or failed:
+        print(f"Перенесено фотографий: {migrated}, с ошибками: {failed}")
+
+
+@migration(9, 'Уникальные имена пользователей')
+def unique_usernames(connection):
+    # В старых users.db имя не было уникальным. Остается запись с профилем
+    # (иначе первая зарегистрированная), а для admin - всегда первая: иначе
+    # дубликат admin, зарегистрированный кем угодно, получил бы админ-панель
+    removed = [row[0] for row in connection.execute('''
+    SELECT id FROM users WHERE id NOT IN (
+        SELECT CASE WHEN u.username = 'admin' THEN MIN(u.id)
+                    ELSE COALESCE(MAX(p.user_id), MIN(u.id)) END
+        FROM users u
+        LEFT JOIN user_profiles p ON p.user_id = u.id
+        GROUP BY u.username
+    )
+    ''').fetchall()]
+    if removed:
+        for table in ('profile_experience', 'profile_languages', 'user_profiles'):
+            connection.executemany(f'DELETE FROM {table} WHERE user_id = ?', [(i,) for i in removed])
+        connection.executemany('DELETE FROM users WHERE id = ?', [(i,) for i in removed])
+        print(f"Удалено пользователей с повторяющимся именем: {len(removed)}")
+    # В PostgreSQL таблица с самого начала создается миграцией 1 с UNIQUE (username)
+    if db.BACKEND != 'postgresql':
+        connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_users_username ON users (username)')
+
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    """Номер последней примененной миграции, 0 для пустой базы."""
+    if not _table_exists(connection, 'schema_version'):
+        return 0
+    return connection.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(connection):
+    """Применяет недостающие миграции одной транзакцией.
+
+    Возвращает список примененных (версия, описание); при ошибке откатывается все.
+    """
+    # Берем блокировку записи до чтения версии: параллельный запуск дождется
+    # первого и увидит уже обновленную схему
+    if db.BACKEND == 'postgresql':
+        connection.execute('SELECT pg_advisory_xact_lock(?)', (LOCK_KEY,))
+    else:
+        connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+        ''')
+        version = current_version(connection)
+        applied = []
+        for number, description, step in MIGRATIONS:
+            if number <= version:
+                continue
+            step(connection)
+            connection.execute(
+                f'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, {db.NOW})',
+                (number, description))
+            applied.append((number, description))
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return applied
+
+
+def check(connection):
+    """Проверка при запуске воркера: один SELECT, схема не меняется."""
+    version = current_version(connection)
+    if version < LATEST_VERSION:
+        raise SchemaOutdated(
+            f'Схема базы версии {version}, приложению нужна {LATEST_VERSION}: '
+            f'выполните flask --app app migrate-db')
+    return version
+
+
+# Таблицы с данными в порядке внешних ключей. Поиск SQLite (user_profiles_fts)
+# в PostgreSQL заменяет индекс по выражению, его не переносим
+COPY_TABLES = ('users', 'user_profiles', 'profile_experience', 'profile_languages')
+COPY_BATCH_SIZE = 500
+
+
+def copy_from_sqlite(path):
+    """Переносит данные файла SQLite в пустую базу PostgreSQL из DATABASE_URL.
+
+    Схемы обеих баз должны быть в актуальной версии (migrate-db для каждой).
+    Идентификаторы сохраняются, перенос идет одной транзакцией.
+    Возвращает {таблица: число строк}.
+    """
+    if db.BACKEND != 'postgresql':
+        raise RuntimeError('DATABASE_URL должен указывать на PostgreSQL')
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'Файл базы не найден: {path}')
+
+    source = db.connect(path)
+    target = db.connect()
+    try:
+        # current_version выбирает диалект по DATABASE_URL, а источник - SQLite
+        has_versions = source.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone()
+        version = source.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] if has_versions else 0
+        if version != LATEST_VERSION:
+            raise SchemaOutdated(
+                f'Схема {path} версии {version}, нужна {LATEST_VERSION}: '
+                f'выполните DATABASE_URL=sqlite:///{path} flask --app app migrate-db')
+        check(target)
+        target.execute('SELECT pg_advisory_xact_lock(?)', (LOCK_KEY,))
+        # В новой базе после migrate-db есть только администратор по умолчанию
+        users = target.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        profiles_count = target.execute('SELECT COUNT(*) FROM user_profiles').fetchone()[0]
+        if users > 1 or profiles_count:
+            raise RuntimeError('База PostgreSQL уже содержит данные, перенос отменен')
+        target.execute('DELETE FROM users')
+
+        copied = {}
+        for table in COPY_TABLES:
+            target_columns = _columns(target, table)
+            columns = [row['name'] for row in source.execute(f'PRAGMA table_info({table})')
+                       if row['name'] in target_columns]
+            # SQLite хранит BOOLEAN числом 0/1
+            flags = {row[0] for row in target.execute(
+                'SELECT column_name FROM information_schema.columns '
+                "WHERE table_schema = current_schema() AND table_name = ? AND data_type = 'boolean'",
+                (table,))}
+            positions = [i for i, name in enumerate(columns) if name in flags]
+            insert = (f'INSERT INTO {table} ({", ".join(columns)}) '
+                      f'VALUES ({", ".join("?" for _ in columns)})')
+
+            cursor = source.execute(f'SELECT {", ".join(columns)} FROM {table} ORDER BY id')
+            copied[table] = 0
+            while True:
+                rows = cursor.fetchmany(COPY_BATCH_SIZE)
+                if not rows:
+                    break
+                batch = []
+                for row in rows:
+                    values = list(row)
+                    for i in positions:
+                        if values[i] is not None:
+                            values[i] = bool(values[i])
+                    batch.append(values)
+                target.executemany(insert, batch)
+                copied[table] += len(batch)
+            # Идентификаторы вставлены явно: счетчик продолжается после максимального
+            target.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                           f'COALESCE(MAX(id), 0) + 1, false) FROM {table}')
+        target.commit()
+        return copied
+    except Exception:
+        target.rollback()
+        raise
+    finally:
+        source.close()
+        target.close()
+
+
+def migrate_database():
+    connection = db.connect()
+    try:
+        return migrate(connection)
+    finally:
+        connection.close()
+
+
+def check_database():
+    connection = db.connect()
+    try:
+        return check(connection)
+    finally:
+        connection.close()
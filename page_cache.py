@@ -0,0 +1,94 @@
+# Кэш отрендеренных страниц резюме и портфолио в памяти воркера.
+# Запись действительна, пока совпадает версия профиля (user_profiles.updated_at),
+# поэтому сохранение профиля в другом воркере тоже делает ее устаревшей.
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', '1000'))
+
+CachedPage = namedtuple('CachedPage', 'body etag last_modified version')
+
+
+def make_etag(user_id, template, version):
+    digest = hashlib.sha1(f'{user_id}:{template}:{version}'.encode()).hexdigest()
+    return digest[:32]
+
+
+def parse_version_time(version):
+    """updated_at ('ГГГГ-ММ-ДД ЧЧ:ММ:СС.ССС', UTC) -> datetime для Last-Modified."""
+    if not version:
+        return None
+    try:
+        parsed = datetime.strptime(version[:19], '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc)
+
+
+class PageCache:
+    """LRU-кэш с ограничением по числу записей и суммарному размеру."""
+
+    def __init__(self, max_bytes=PAGE_CACHE_MAX_BYTES, max_entries=PAGE_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, version):
+        user_id, template = key
+        entry = CachedPage(body, make_etag(user_id, template, version),
+                           parse_version_time(version), version)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+        return entry
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                self._discard(key)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+pages = PageCache()
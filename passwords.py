@@ -0,0 +1,126 @@
+# Хэширование паролей. Вычисление KDF выполняется в отдельном ограниченном пуле
+# потоков: всплеск входов не занимает все потоки воркера, а при переполнении
+# очереди запрос сразу получает отказ вместо долгого ожидания.
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Формат метода как у werkzeug: scrypt:N:r:p или pbkdf2:sha256:итерации
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:16384:8:1')
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS', '2'))
+HASH_QUEUE_LIMIT = int(os.environ.get('HASH_QUEUE_LIMIT', '16'))
+HASH_TIMEOUT = float(os.environ.get('HASH_TIMEOUT', '10'))
+
+_HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+
+class QueueFull(Exception):
+    """Пул хэширования перегружен, запрос нужно повторить позже."""
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.startswith(_HASH_PREFIXES) and stored.count('$') == 2
+
+
+def hash_method(stored):
+    return stored.split('$', 1)[0] if is_hashed(stored) else None
+
+
+class Hasher:
+    """Пул потоков для хэширования и проверки паролей с ограничением очереди."""
+
+    def __init__(self, method=PASSWORD_HASH_METHOD, workers=HASH_WORKERS,
+                 limit=HASH_QUEUE_LIMIT, timeout=HASH_TIMEOUT):
+        self.method = method
+        self.workers = workers
+        self.limit = limit
+        self.timeout = timeout
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._dummy_hash = None
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_executor(self):
+        # Потоки не переживают fork: каждому воркеру gunicorn свой пул
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix='password-hash')
+            self._executor_pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, func, *args):
+        # Место в очереди освобождается, когда задача выполнена или снята с очереди,
+        # а не когда запрос перестал ее ждать: лимит ограничивает реальную очередь KDF
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.limit:
+                self.rejected += 1
+                raise QueueFull('Слишком много одновременных проверок пароля')
+            self._pending += 1
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        try:
+            result = future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Еще не начатая задача снимается с очереди; начатую KDF прервать
+            # нельзя, она держит место до завершения
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise QueueFull('Проверка пароля не уложилась во время ожидания')
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        """Проверяет пароль, возвращает (совпал, нужно_перехэшировать).
+
+        Пароли, сохраненные открытым текстом до перехода на хэши, и хэши
+        с устаревшей стоимостью отмечаются для перехэширования.
+        """
+        if stored is None:
+            # Неизвестный пользователь: тратим столько же времени, сколько на проверку,
+            # чтобы по времени ответа нельзя было подобрать существующие имена
+            if self._dummy_hash is None:
+                self._dummy_hash = generate_password_hash('', self.method)
+            self._run(check_password_hash, self._dummy_hash, password)
+            return False, False
+        if not is_hashed(stored):
+            return hmac.compare_digest(stored.encode(), password.encode()), True
+        ok = self._run(check_password_hash, stored, password)
+        return ok, ok and hash_method(stored) != self.method
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'limit': self.limit,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+            }
+
+
+hasher = Hasher()
@@ -0,0 +1,251 @@
+# Серверный экспорт резюме в PDF. Рендер выполняется в ограниченном пуле
+# фоновых потоков, готовые файлы хранятся на диске по версии профиля.
+# Рядом с файлом задача оставляет метки .running (хост и pid воркера) и .failed
+# (текст ошибки): по ним статус задачи видят и другие воркеры, а при общем
+# PDF_CACHE_DIR - и другие экземпляры приложения.
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import photos
+
+PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', 'pdf_cache')
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', '2'))
+PDF_QUEUE_LIMIT = int(os.environ.get('PDF_QUEUE_LIMIT', '16'))
+JOB_TTL = 3600
+# Задача другого хоста считается выполняемой, пока ее метка моложе этого срока:
+# проверить pid чужого процесса нельзя
+REMOTE_RUNNING_TTL = 300
+
+# Относительные ссылки страницы (/static, /assets, /photos) резолвятся от этого адреса
+# и читаются с диска, а не через HTTP к самому приложению
+LOCAL_BASE_URL = 'http://artistcard.local/'
+LOCAL_PREFIXES = {
+    'static/': 'static',
+    'assets/': os.path.join('static', 'dist'),
+}
+
+
+class QueueFull(Exception):
+    """Очередь рендера переполнена, запрос нужно повторить позже."""
+
+
+class Job:
+    __slots__ = ('id', 'user_id', 'path', 'status', 'error', 'created')
+
+    def __init__(self, job_id, user_id, path):
+        self.id = job_id
+        self.user_id = user_id
+        self.path = path
+        self.status = 'queued'
+        self.error = None
+        self.created = time.time()
+
+
+def pdf_path(user_id, version_key):
+    return os.path.join(PDF_CACHE_DIR, str(user_id), f'{version_key}.pdf')
+
+
+def _marker_path(path, kind):
+    return f'{path}.{kind}'
+
+
+def _write_marker(path, kind, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(_marker_path(path, kind), 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _remove_marker(path, kind):
+    try:
+        os.remove(_marker_path(path, kind))
+    except OSError:
+        pass
+
+
+def _read_marker(path, kind):
+    try:
+        with open(_marker_path(path, kind), encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def disk_status(path):
+    """Статус задачи, которой нет в этом воркере, по файлам на диске.
+
+    Возвращает (статус, ошибка). 'unknown' - задачу никто не выполняет
+    (воркер перезапущен или упал), клиенту нужно поставить ее заново.
+    """
+    if os.path.exists(path):
+        return 'done', None
+    error = _read_marker(path, 'failed')
+    if error is not None:
+        return 'failed', error
+    host, _, pid = (_read_marker(path, 'running') or '').rpartition(' ')
+    if host == socket.gethostname():
+        if pid.isdigit() and _pid_alive(int(pid)):
+            return 'running', None
+    elif host:
+        try:
+            if time.time() - os.path.getmtime(_marker_path(path, 'running')) < REMOTE_RUNNING_TTL:
+                return 'running', None
+        except OSError:
+            pass
+    return 'unknown', None
+
+
+def _photo_path(relative):
+    # photos/<хэш>/<вариант>.jpg, как в маршруте /photos; файл лежит по пути
+    # из хранилища фотографий, а не под прямым префиксом каталога
+    photo_hash, _, name = relative.partition('/')
+    variant, extension = os.path.splitext(name)
+    if photos.is_photo_hash(photo_hash) and variant in photos.VARIANTS and extension == '.jpg':
+        return photos.variant_path(photo_hash, variant)
+    return None
+
+
+def _local_path(url):
+    relative = url[len(LOCAL_BASE_URL):].split('?', 1)[0]
+    if relative.startswith('photos/'):
+        return _photo_path(relative[len('photos/'):])
+    for prefix, directory in LOCAL_PREFIXES.items():
+        if relative.startswith(prefix):
+            path = os.path.normpath(os.path.join(directory, relative[len(prefix):]))
+            if os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory):
+                return path
+    return None
+
+
+def _url_fetcher(url):
+    if url.startswith(LOCAL_BASE_URL):
+        path = _local_path(url)
+        if path is None or not os.path.exists(path):
+            raise ValueError(f'Ресурс не найден: {url}')
+        with open(path, 'rb') as f:
+            return {'string': f.read(), 'filename': os.path.basename(path)}
+    if url.startswith('data:'):
+        # Фотографии, не перенесенные в хранилище, встроены в страницу
+        from weasyprint import default_url_fetcher
+
+        return default_url_fetcher(url)
+    # Внешние ресурсы (font-awesome с cdnjs и его шрифты) в рендере не скачиваются:
+    # загрузка по сети растягивала рендер на секунды и зависала без доступа наружу.
+    # Вместо таблиц стилей - пустая, иконки в PDF не выводятся
+    if url.split('?', 1)[0].endswith('.css'):
+        return {'string': b'', 'mime_type': 'text/css'}
+    raise ValueError(f'Внешний ресурс не загружается: {url}')
+
+
+def render_pdf(html, path):
+    # WeasyPrint импортируется лениво: ему нужны системные библиотеки (pango),
+    # и без них приложение должно запускаться
+    from weasyprint import HTML
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        HTML(string=html, base_url=LOCAL_BASE_URL, url_fetcher=_url_fetcher).write_pdf(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Неудачная задача ставится заново по каждому нажатию: недописанные файлы не копим
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Файлы и метки прежних версий профиля больше не понадобятся
+    directory = os.path.dirname(path)
+    for name in os.listdir(directory):
+        old_path = os.path.join(directory, name)
+        if old_path != path and name.endswith(('.pdf', '.failed')):
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+
+class RenderQueue:
+    """Пул рендера с ограничением числа ожидающих и выполняемых задач."""
+
+    def __init__(self, workers=PDF_WORKERS, limit=PDF_QUEUE_LIMIT):
+        self.workers = workers
+        self.limit = limit
+        self._executor = None
+        self._executor_pid = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Потоки не переживают fork: каждому воркеру gunicorn свой пул
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix='pdf-render')
+            self._executor_pid = os.getpid()
+            self._jobs = {}
+        return self._executor
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(self, job_id, user_id, html, path):
+        """Ставит рендер в очередь; повторный запрос той же версии получает ту же задачу."""
+        with self._lock:
+            executor = self._get_executor()
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != 'failed':
+                return job
+            active = sum(1 for j in self._jobs.values() if j.status in ('queued', 'running'))
+            if active >= self.limit:
+                raise QueueFull('Слишком много задач рендера PDF')
+            job = Job(job_id, user_id, path)
+            self._jobs[job_id] = job
+        # Повторная попытка после ошибки: прежняя метка больше не актуальна
+        _remove_marker(path, 'failed')
+        _write_marker(path, 'running', f'{socket.gethostname()} {os.getpid()}')
+        executor.submit(self._run, job, html)
+        return job
+
+    def _run(self, job, html):
+        job.status = 'running'
+        try:
+            render_pdf(html, job.path)
+            job.status = 'done'
+        except Exception as e:
+            print(f"Ошибка рендера PDF: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+            _write_marker(job.path, 'failed', job.error)
+        finally:
+            _remove_marker(job.path, 'running')
+
+    def _prune(self):
+        expired = time.time() - JOB_TTL
+        for job_id in [k for k, j in self._jobs.items()
+                       if j.created < expired and j.status in ('done', 'failed')]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return dict(counts, workers=self.workers, limit=self.limit)
+
+
+queue = RenderQueue()
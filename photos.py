@@ -0,0 +1,143 @@
+# Хранилище фотографий профилей: файлы адресуются sha256 содержимого,
+# в user_profiles.photo хранится только хэш.
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import threading
+
+from PIL import Image, ImageOps
+
+PHOTO_STORE_DIR = os.environ.get('PHOTO_STORE_DIR', 'photo_store')
+MAX_PHOTO_BYTES = int(os.environ.get('MAX_PHOTO_BYTES', str(10 * 1024 * 1024)))
+# Небольшой сжатый файл может распаковаться в сотни мегапикселей: размер
+# проверяется по заголовку до декодирования
+MAX_PHOTO_PIXELS = int(os.environ.get('MAX_PHOTO_PIXELS', str(25 * 1000 * 1000)))
+
+# Предрассчитанные размеры: миниатюра для страниц и версия для печати резюме
+VARIANTS = {
+    'thumb': 360,
+    'print': 720,
+}
+
+_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+_DATA_URL_RE = re.compile(r'^data:image/[\w.+-]+;base64,', re.IGNORECASE)
+
+
+def is_photo_hash(value):
+    return bool(value) and _HASH_RE.match(value) is not None
+
+
+def decode_data_url(data_url):
+    """Декодирует data URL из поля photo_data в байты изображения."""
+    match = _DATA_URL_RE.match(data_url or '')
+    if not match:
+        raise ValueError('Неподдерживаемый формат фотографии')
+    try:
+        data = base64.b64decode(data_url[match.end():], validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('Поврежденные данные фотографии')
+    if len(data) > MAX_PHOTO_BYTES:
+        raise ValueError('Фотография слишком большая')
+    return data
+
+
+def _photo_dir(photo_hash):
+    return os.path.join(PHOTO_STORE_DIR, photo_hash[:2], photo_hash)
+
+
+def variant_path(photo_hash, variant):
+    return os.path.join(_photo_dir(photo_hash), f'{variant}.jpg')
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def save_photo(data):
+    """Сохраняет оригинал и уменьшенные копии, возвращает хэш содержимого.
+
+    Повторная загрузка той же фотографии не пересчитывает варианты.
+    """
+    photo_hash = hashlib.sha256(data).hexdigest()
+    directory = _photo_dir(photo_hash)
+    if all(os.path.exists(variant_path(photo_hash, v)) for v in VARIANTS):
+        return photo_hash
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError:
+        raise ValueError('Разрешение фотографии слишком большое')
+    except Exception:
+        raise ValueError('Файл не является изображением')
+    width, height = image.size
+    if width * height > MAX_PHOTO_PIXELS:
+        raise ValueError('Разрешение фотографии слишком большое')
+
+    largest = max(VARIANTS.values())
+    try:
+        # JPEG декодируется сразу в уменьшенном масштабе (не меньше самого большого варианта)
+        image.draft('RGB', (largest, largest))
+        image.load()
+    except Exception:
+        raise ValueError('Файл не является изображением')
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    # Варианты строятся из одной уменьшенной копии, а не из полноразмерного изображения
+    image.thumbnail((largest, largest), Image.LANCZOS, reducing_gap=3.0)
+    if image.mode != 'RGB':
+        # Прозрачный фон заменяем белым, JPEG не поддерживает альфа-канал
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        image = background
+
+    os.makedirs(directory, exist_ok=True)
+    _write_atomic(os.path.join(directory, 'original'), data)
+    for variant, size in VARIANTS.items():
+        _write_atomic(variant_path(photo_hash, variant), _render_variant(image, size))
+    return photo_hash
+
+
+def migrate_photos(connection):
+    """Переносит base64-фотографии из user_profiles.photo в хранилище.
+
+    Коммит остается за вызывающим (миграция 8). Нераспознанные фотографии
+    остаются в базе как есть и показываются прежней data:-ссылкой.
+    """
+    rows = connection.execute(
+        "SELECT id, photo FROM user_profiles WHERE photo LIKE 'data:%'"
+    ).fetchall()
+    migrated = 0
+    failed = 0
+    for row in rows:
+        try:
+            photo_hash = save_photo(decode_data_url(row['photo']))
+        except ValueError as e:
+            print(f"Профиль {row['id']}: фотография не перенесена ({e})")
+            failed += 1
+            continue
+        connection.execute('UPDATE user_profiles SET photo = ? WHERE id = ?', (photo_hash, row['id']))
+        migrated += 1
+    return migrated, failed
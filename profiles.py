@@ -0,0 +1,518 @@
+# Доступ к пользователям и профилям: для каждой страницы выбираются только нужные
+# ей столбцы вместо SELECT * FROM user_profiles. Запросы общие для SQLite и
+# PostgreSQL, различия диалектов берутся из db.
+import re
+import secrets
+
+import db
+
+ADMIN_PAGE_SIZE = 50
+
+# Ранг статуса для сортировки: -1 без профиля, 0 на проверке, 1 опубликован.
+# Хранится в users.status_rank под индексом (status_rank, id), по которому
+# идут страницы списка; меняется вместе с профилем в upsert_profile и set_completed
+RANK_EMPTY, RANK_PENDING, RANK_COMPLETED = -1, 0, 1
+
+# Фильтры списка пользователей в админ-панели
+STATUS_FILTERS = {
+    'completed': f'u.status_rank = {RANK_COMPLETED}',
+    'pending': "COALESCE(up.full_name, '') != '' AND NOT COALESCE(up.is_completed, FALSE)",
+    'empty': "COALESCE(up.full_name, '') = ''",
+}
+
+PROFILE_FIELDS = (
+    'id', 'user_id', 'full_name', 'birth_date', 'email', 'phone', 'bio', 'skills',
+    'job_position', 'salary_expectations', 'education', 'courses', 'certificates',
+    'github', 'linkedin', 'vk', 'telegram', 'portfolio_link', 'photo',
+    'experience', 'languages', 'is_completed',
+)
+
+# Форма создания портфолио (create_portfolio.html)
+FORM_FIELDS = (
+    'full_name', 'birth_date', 'email', 'phone', 'bio', 'skills', 'job_position',
+    'salary_expectations', 'education', 'courses', 'certificates', 'github',
+    'linkedin', 'vk', 'telegram', 'portfolio_link', 'photo',
+)
+
+# Форма редактирования профиля администратором (edit_user.html)
+EDIT_FIELDS = (
+    'full_name', 'birth_date', 'email', 'phone', 'bio', 'skills', 'education',
+    'is_completed',
+)
+
+# Резюме (resume.html)
+RESUME_FIELDS = (
+    'full_name', 'birth_date', 'email', 'phone', 'bio', 'skills', 'job_position',
+    'salary_expectations', 'education', 'courses', 'linkedin', 'photo',
+)
+
+# Страница портфолио (view_portfolio.html). Опыт работы и языки читаются
+# из profile_experience / profile_languages, а не из текстовых столбцов.
+PORTFOLIO_FIELDS = tuple(f for f in PROFILE_FIELDS
+                         if f not in ('id', 'user_id', 'is_completed', 'experience', 'languages'))
+
+
+class ExperienceEntry:
+    """Место работы из profile_experience."""
+
+    __slots__ = ('company', 'position', 'start_date', 'end_date', 'responsibilities')
+
+    def __init__(self, company, position, start_date='', end_date='', responsibilities=''):
+        self.company = company
+        self.position = position
+        self.start_date = start_date or ''
+        self.end_date = end_date or ''
+        self.responsibilities = responsibilities or ''
+
+    @property
+    def period(self):
+        if not self.start_date:
+            return ''
+        return f"{self.start_date} - {self.end_date or 'по настоящее время'}"
+
+
+class LanguageEntry:
+    """Язык и уровень владения из profile_languages."""
+
+    __slots__ = ('language', 'level')
+
+    def __init__(self, language, level):
+        self.language = language
+        self.level = level
+
+
+class Profile:
+    """Строка user_profiles; не выбранные запросом поля равны None."""
+
+    __slots__ = PROFILE_FIELDS + ('experience_entries', 'language_entries')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(**dict(zip(row.keys(), row)))
+
+    def experience_text(self):
+        """Опыт работы одним текстом для формы администратора."""
+        parts = []
+        for entry in self.experience_entries or ():
+            text = f"{entry.company} - {entry.position}\n"
+            if entry.period:
+                text += f"Период: {entry.period}\n"
+            if entry.responsibilities:
+                text += f"Обязанности: {entry.responsibilities}\n"
+            parts.append(text)
+        return "\n---\n".join(parts)
+
+    def __repr__(self):
+        return f'<Profile user_id={self.user_id!r} full_name={self.full_name!r}>'
+
+
+class UserSummary:
+    """Строка списка пользователей в админ-панели."""
+
+    __slots__ = ('id', 'username', 'full_name', 'birth_date', 'is_completed',
+                 'birth_date_display', 'sort_rank')
+
+    def __init__(self, id, username, full_name, birth_date, is_completed, sort_rank=None):
+        self.id = id
+        self.username = username
+        self.full_name = full_name
+        self.birth_date = birth_date
+        self.is_completed = is_completed
+        self.sort_rank = sort_rank
+        # ГГГГ-ММ-ДД -> ДД.ММ.ГГГГ один раз здесь, а не в шаблоне
+        parts = birth_date.split('-') if birth_date else []
+        self.birth_date_display = '.'.join(reversed(parts)) if len(parts) == 3 else birth_date
+
+
+class UserState:
+    """Имя пользователя и статус его профиля для проверок в маршрутах."""
+
+    __slots__ = ('id', 'username', 'has_profile', 'is_completed', 'public_slug')
+
+    def __init__(self, id, username, has_profile, is_completed, public_slug=None):
+        self.id = id
+        self.username = username
+        self.has_profile = bool(has_profile)
+        self.is_completed = bool(is_completed)
+        self.public_slug = public_slug
+
+
+def _columns(fields):
+    return ', '.join(fields)
+
+
+def get_profile(connection, user_id, fields=PROFILE_FIELDS, completed_only=False, with_entries=False):
+    if with_entries:
+        # Текстовые столбцы нужны профилям, еще не перенесенным в дочерние таблицы
+        fields = tuple(fields) + tuple(f for f in ('experience', 'languages') if f not in fields)
+    query = f'SELECT {_columns(fields)} FROM user_profiles WHERE user_id = ?'
+    if completed_only:
+        query += ' AND is_completed = TRUE'
+    row = connection.execute(query, (user_id,)).fetchone()
+    if not row:
+        return None
+    profile = Profile.from_row(row)
+    if with_entries:
+        profile.experience_entries = (get_experience(connection, user_id)
+                                      or parse_experience_text(profile.experience))
+        profile.language_entries = (get_languages(connection, user_id)
+                                    or parse_languages_text(profile.languages))
+    return profile
+
+
+def get_experience(connection, user_id):
+    rows = connection.execute('''
+        SELECT company, position, start_date, end_date, responsibilities
+        FROM profile_experience WHERE user_id = ? ORDER BY position_index
+    ''', (user_id,))
+    return [ExperienceEntry(*row) for row in rows]
+
+
+def get_languages(connection, user_id):
+    rows = connection.execute(
+        'SELECT language, level FROM profile_languages WHERE user_id = ? ORDER BY position_index',
+        (user_id,)
+    )
+    return [LanguageEntry(*row) for row in rows]
+
+
+def replace_experience(connection, user_id, entries):
+    """Заменяет опыт работы пользователя; коммит остается за вызывающим."""
+    connection.execute('DELETE FROM profile_experience WHERE user_id = ?', (user_id,))
+    connection.executemany('''
+        INSERT INTO profile_experience
+        (user_id, position_index, company, position, start_date, end_date, responsibilities)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(user_id, i, e.company, e.position, e.start_date, e.end_date, e.responsibilities)
+          for i, e in enumerate(entries)])
+
+
+def replace_languages(connection, user_id, entries):
+    """Заменяет список языков пользователя; коммит остается за вызывающим."""
+    connection.execute('DELETE FROM profile_languages WHERE user_id = ?', (user_id,))
+    connection.executemany(
+        'INSERT INTO profile_languages (user_id, position_index, language, level) VALUES (?, ?, ?, ?)',
+        [(user_id, i, e.language, e.level) for i, e in enumerate(entries)]
+    )
+
+
+def parse_experience_text(text):
+    """Разбирает прежний текстовый формат опыта работы (записи через ---)."""
+    entries = []
+    for part in (text or '').split('\n---\n'):
+        lines = part.strip().split('\n')
+        if not lines[0].strip():
+            continue
+        company, _, position = lines[0].partition(' - ')
+        entry = ExperienceEntry(company.strip(), position.strip())
+        responsibilities = []
+        for line in lines[1:]:
+            if line.startswith('Период:'):
+                start, _, end = line[len('Период:'):].strip().partition(' - ')
+                entry.start_date = start.strip()
+                end = end.strip()
+                entry.end_date = '' if end == 'по настоящее время' else end
+            elif line.startswith('Обязанности:'):
+                responsibilities.append(line[len('Обязанности:'):].strip())
+            elif responsibilities:
+                # Продолжение многострочного описания обязанностей
+                responsibilities.append(line)
+        entry.responsibilities = '\n'.join(responsibilities).strip()
+        entries.append(entry)
+    return entries
+
+
+def parse_languages_text(text):
+    """Разбирает строки вида "Английский (B2)"."""
+    entries = []
+    for line in (text or '').split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        language, _, level = line.partition(' (')
+        entries.append(LanguageEntry(language.strip(), level.rstrip(')').strip()))
+    return entries
+
+
+def migrate_structured(connection):
+    """Переносит текстовые experience/languages в дочерние таблицы.
+
+    Возвращает число перенесенных списков; уже перенесенные не трогает.
+    Коммит остается за вызывающим (миграция 8).
+    """
+    rows = connection.execute('''
+        SELECT up.user_id, up.experience, up.languages,
+               EXISTS (SELECT 1 FROM profile_experience e WHERE e.user_id = up.user_id) AS has_experience,
+               EXISTS (SELECT 1 FROM profile_languages l WHERE l.user_id = up.user_id) AS has_languages
+        FROM user_profiles up
+        WHERE COALESCE(up.experience, '') != '' OR COALESCE(up.languages, '') != ''
+    ''').fetchall()
+    migrated = 0
+    for row in rows:
+        if row['experience'] and not row['has_experience']:
+            replace_experience(connection, row['user_id'], parse_experience_text(row['experience']))
+            migrated += 1
+        if row['languages'] and not row['has_languages']:
+            replace_languages(connection, row['user_id'], parse_languages_text(row['languages']))
+            migrated += 1
+    return migrated
+
+
+# Поля, которые при UPSERT с None сохраняют прежнее значение
+KEEP_IF_NULL = ('photo',)
+
+
+def upsert_profile(connection, user_id, fields, is_completed):
+    """Создает или обновляет профиль одним INSERT ... ON CONFLICT DO UPDATE.
+
+    fields - столбцы user_profiles и их значения. Коммит остается за вызывающим.
+    """
+    names = [name for name in fields if name in PROFILE_FIELDS and name not in ('id', 'user_id', 'is_completed')]
+    assignments = []
+    for name in names + ['is_completed', 'updated_at']:
+        if name in KEEP_IF_NULL:
+            assignments.append(f'{name} = COALESCE(excluded.{name}, user_profiles.{name})')
+        else:
+            assignments.append(f'{name} = excluded.{name}')
+
+    # public_slug задается только при создании профиля, ссылка не меняется
+    connection.execute(f'''
+        INSERT INTO user_profiles (user_id, public_slug, {', '.join(names)}, is_completed, updated_at)
+        VALUES (?, ?, {', '.join('?' for _ in names)}, ?, {db.NOW})
+        ON CONFLICT (user_id) DO UPDATE SET {', '.join(assignments)}
+    ''', [user_id, new_public_slug()] + [fields[name] for name in names] + [bool(is_completed)])
+    connection.execute('UPDATE users SET status_rank = ? WHERE id = ?',
+                       (RANK_COMPLETED if is_completed else RANK_PENDING, user_id))
+
+
+def set_completed(connection, user_ids, completed):
+    """Публикует или снимает с публикации профили пачкой; коммит за вызывающим.
+
+    Пользователи без профиля пропускаются. Возвращает число измененных профилей.
+    """
+    cursor = connection.executemany(f'''
+        UPDATE user_profiles
+        SET is_completed = ?, updated_at = {db.NOW}
+        WHERE user_id = ?
+    ''', [(bool(completed), user_id) for user_id in user_ids])
+    updated = cursor.rowcount
+    connection.executemany('''
+        UPDATE users SET status_rank = ?
+        WHERE id = ? AND EXISTS (SELECT 1 FROM user_profiles WHERE user_id = users.id)
+    ''', [(RANK_COMPLETED if completed else RANK_PENDING, user_id) for user_id in user_ids])
+    return updated
+
+
+# Выгрузка опубликованных профилей: опыт работы и языки собираются в JSON
+EXPORT_FIELDS = ('user_id', 'username') + tuple(
+    f for f in PROFILE_FIELDS if f not in ('id', 'user_id', 'experience', 'languages', 'is_completed')
+) + ('updated_at', 'experience', 'languages')
+
+
+def export_completed(connection):
+    """Курсор по опубликованным профилям; строки читаются по мере выгрузки."""
+    columns = ', '.join(f'up.{f}' for f in EXPORT_FIELDS
+                        if f not in ('user_id', 'username', 'experience', 'languages'))
+    if db.BACKEND == 'postgresql':
+        experience = '''(SELECT COALESCE(json_agg(json_build_object(
+                    'company', e.company, 'position', e.position,
+                    'start_date', e.start_date, 'end_date', e.end_date,
+                    'responsibilities', e.responsibilities) ORDER BY e.position_index), '[]')::text
+                FROM profile_experience e WHERE e.user_id = up.user_id)'''
+        languages = '''(SELECT COALESCE(json_agg(json_build_object(
+                    'language', l.language, 'level', l.level) ORDER BY l.position_index), '[]')::text
+                FROM profile_languages l WHERE l.user_id = up.user_id)'''
+    else:
+        experience = '''(SELECT json_group_array(json_object(
+                    'company', e.company, 'position', e.position,
+                    'start_date', e.start_date, 'end_date', e.end_date,
+                    'responsibilities', e.responsibilities))
+                FROM (SELECT * FROM profile_experience
+                      WHERE user_id = up.user_id ORDER BY position_index) e)'''
+        languages = '''(SELECT json_group_array(json_object('language', l.language, 'level', l.level))
+                FROM (SELECT * FROM profile_languages
+                      WHERE user_id = up.user_id ORDER BY position_index) l)'''
+    return connection.stream(f'''
+        SELECT up.user_id, u.username, {columns},
+               {experience} AS experience,
+               {languages} AS languages
+        FROM user_profiles up
+        JOIN users u ON u.id = up.user_id
+        WHERE up.is_completed = TRUE
+        ORDER BY up.user_id
+    ''')
+
+
+def get_profile_version(connection, user_id):
+    """updated_at опубликованного профиля; None, если профиль не опубликован."""
+    row = connection.execute(
+        'SELECT updated_at FROM user_profiles WHERE user_id = ? AND is_completed = TRUE',
+        (user_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return row['updated_at'] or ''
+
+
+# Публичная ссылка на профиль: непрозрачный идентификатор вместо user_id,
+# чтобы опубликованные профили нельзя было перебрать по порядку
+PUBLIC_SLUG_RE = re.compile(r'[A-Za-z0-9_-]{12}')
+
+
+def new_public_slug():
+    return secrets.token_urlsafe(9)
+
+
+def get_public_version(connection, slug):
+    """(user_id, updated_at) опубликованного профиля по публичной ссылке или None."""
+    if not PUBLIC_SLUG_RE.fullmatch(slug):
+        return None
+    row = connection.execute(
+        'SELECT user_id, updated_at FROM user_profiles WHERE public_slug = ? AND is_completed = TRUE',
+        (slug,)
+    ).fetchone()
+    if row is None:
+        return None
+    return row['user_id'], row['updated_at'] or ''
+
+
+def get_user(connection, user_id):
+    return connection.execute(
+        'SELECT id, username FROM users WHERE id = ?', (user_id,)
+    ).fetchone()
+
+
+def create_user(connection, username, password_hash):
+    """Создает пользователя и возвращает его id; коммит остается за вызывающим.
+
+    Занятое имя - db.IntegrityError.
+    """
+    if db.BACKEND == 'postgresql':
+        return connection.execute(
+            'INSERT INTO users (username, password) VALUES (?, ?) RETURNING id',
+            (username, password_hash)
+        ).fetchone()[0]
+    return connection.execute(
+        'INSERT INTO users (username, password) VALUES (?, ?)', (username, password_hash)
+    ).lastrowid
+
+
+def get_credentials(connection, username):
+    # Имя уникально (миграция 9): не больше одной записи
+    return connection.execute(
+        'SELECT id, password FROM users WHERE username = ?', (username,)
+    ).fetchone()
+
+
+def update_password(connection, user_id, old_hash, new_hash):
+    """Заменяет хэш пароля, если его не изменил параллельный запрос."""
+    connection.execute(
+        'UPDATE users SET password = ? WHERE id = ? AND password = ?',
+        (new_hash, user_id, old_hash)
+    )
+
+
+def get_user_state(connection, user_id):
+    row = connection.execute('''
+        SELECT u.id, u.username, p.user_id IS NOT NULL, COALESCE(p.is_completed, FALSE),
+               p.public_slug
+        FROM users u
+        LEFT JOIN user_profiles p ON p.user_id = u.id
+        WHERE u.id = ?
+    ''', (user_id,)).fetchone()
+    return UserState(*row) if row else None
+
+
+def _fts_query(search):
+    # Каждое слово ищется по префиксу: "иван"* "python"* (FTS5)
+    # или иван:* & python:* (tsquery PostgreSQL)
+    terms = re.findall(r'\w+', search)
+    if db.BACKEND == 'postgresql':
+        return ' & '.join(f'{term}:*' for term in terms)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _search_condition():
+    if db.BACKEND == 'postgresql':
+        import db_postgres
+
+        return f'''(u.username ILIKE ? ESCAPE '\\' OR up.id IN (
+                SELECT id FROM user_profiles WHERE {db_postgres.SEARCH_VECTOR} @@ to_tsquery('simple', ?)))'''
+    return '''(u.username LIKE ? ESCAPE '\\' OR up.id IN (
+                SELECT rowid FROM user_profiles_fts WHERE user_profiles_fts MATCH ?))'''
+
+
+def parse_cursor(value):
+    """Курсор страницы вида "<ранг статуса>:<id пользователя>"."""
+    try:
+        rank, user_id = value.split(':')
+        return int(rank), int(user_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def list_user_summaries(connection, status=None, search=None, after=None, limit=ADMIN_PAGE_SIZE):
+    """Страница списка пользователей с keyset-пагинацией.
+
+    Возвращает строки страницы и курсор следующей страницы (или None).
+    Порядок прежний: по статусу публикации, затем по id пользователя; страница
+    читается диапазоном индекса idx_users_status_rank без сортировки.
+    """
+    conditions = ["u.username != 'admin'"]
+    params = []
+
+    if status in STATUS_FILTERS:
+        conditions.append(STATUS_FILTERS[status])
+
+    if search:
+        escaped = re.sub(r'([\\%_])', r'\\\1', search.strip())
+        fts_query = _fts_query(search)
+        if fts_query:
+            conditions.append(_search_condition())
+            params.extend([f'{escaped}%', fts_query])
+        else:
+            conditions.append(f"u.username {db.LIKE} ? ESCAPE '\\'")
+            params.append(f'{escaped}%')
+
+    if after:
+        conditions.append('(u.status_rank, u.id) > (?, ?)')
+        params.extend(after)
+
+    rows = connection.execute(f'''
+        SELECT u.id, u.username, up.full_name, up.birth_date, up.is_completed,
+               u.status_rank
+        FROM users u
+        LEFT JOIN user_profiles up ON u.id = up.user_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY u.status_rank, u.id
+        LIMIT ?
+    ''', params + [limit + 1]).fetchall()
+
+    users = [UserSummary(*row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = users[-1]
+        next_cursor = f'{last.sort_rank}:{last.id}'
+    return users, next_cursor
+
+
+def count_user_statuses(connection):
+    """Счетчики для карточек статистики админ-панели.
+
+    Полный проход по пользователям: маршрут берет результат из
+    user_cache.admin_stats, а не считает на каждой загрузке.
+    """
+    row = connection.execute(f'''
+        SELECT COUNT(*) AS total,
+               COALESCE(SUM(CASE WHEN {STATUS_FILTERS['completed']} THEN 1 ELSE 0 END), 0) AS completed,
+               COALESCE(SUM(CASE WHEN {STATUS_FILTERS['pending']} THEN 1 ELSE 0 END), 0) AS pending,
+               COALESCE(SUM(CASE WHEN {STATUS_FILTERS['empty']} THEN 1 ELSE 0 END), 0) AS empty
+        FROM users u
+        LEFT JOIN user_profiles up ON u.id = up.user_id
+        WHERE u.username != 'admin'
+    ''').fetchone()
+    return dict(row)
@@ -0,0 +1,33 @@
+// Анимация при загрузке
+document.addEventListener('DOMContentLoaded', function() {
+    const fadeElements = document.querySelectorAll('.fade-in');
+    fadeElements.forEach((el, index) => {
+        setTimeout(() => {
+            el.style.opacity = '1';
+            el.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+
+    // Выбор всех пользователей на странице
+    const selectAll = document.getElementById('selectAll');
+    if (selectAll) {
+        selectAll.addEventListener('change', function() {
+            document.querySelectorAll('.user-select').forEach(cb => cb.checked = selectAll.checked);
+        });
+    }
+
+    // Добавляем атрибуты data-label для мобильной адаптации
+    const tableCells = document.querySelectorAll('tbody td');
+    const headers = document.querySelectorAll('thead th');
+
+    tableCells.forEach((cell, index) => {
+        const headerIndex = index % headers.length;
+        if (headers[headerIndex]) {
+            const header = headers[headerIndex].cloneNode(true);
+            const icons = header.querySelectorAll('i');
+            icons.forEach(icon => icon.remove());
+            const label = header.textContent.trim();
+            cell.setAttribute('data-label', label);
+        }
+    });
+});
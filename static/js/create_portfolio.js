@@ -0,0 +1,198 @@
+// Предпросмотр фото
+function previewPhoto(event) {
+    const input = event.target;
+    const reader = new FileReader();
+
+    reader.onload = function(){
+        const dataURL = reader.result;
+        const preview = document.getElementById('photoPreview');
+        preview.innerHTML = `<img src="${dataURL}" alt="Фото" class="photo-preview">`;
+        document.getElementById('photo_data').value = dataURL;
+    };
+
+    if (input.files && input.files[0]) {
+        reader.readAsDataURL(input.files[0]);
+    }
+}
+
+// Динамическое добавление опыта работы
+function addExperience() {
+    const container = document.getElementById('experienceContainer');
+    const experienceItem = document.createElement('div');
+    experienceItem.className = 'experience-item';
+    experienceItem.innerHTML = `
+        <div class="d-flex justify-content-between align-items-center mb-3">
+            <h6 class="mb-0">Новое место работы</h6>
+            <button type="button" class="btn btn-danger btn-sm" onclick="removeExperience(this)">
+                <i class="fas fa-times"></i> Удалить
+            </button>
+        </div>
+        <div class="row mb-3">
+            <div class="col-md-6">
+                <label class="form-label">Название компании</label>
+                <input type="text" class="form-control" name="company[]" required placeholder="ООО 'Компания'">
+            </div>
+            <div class="col-md-6">
+                <label class="form-label">Должность</label>
+                <input type="text" class="form-control" name="position[]" required placeholder="Frontend Developer">
+            </div>
+        </div>
+        <div class="row mb-3">
+            <div class="col-md-6">
+                <label class="form-label">Дата начала</label>
+                <input type="month" class="form-control" name="start_date[]" required>
+            </div>
+            <div class="col-md-6">
+                <label class="form-label">Дата окончания</label>
+                <input type="month" class="form-control" name="end_date[]" placeholder="По настоящее время">
+            </div>
+        </div>
+        <div class="row">
+            <div class="col-md-12">
+                <label class="form-label">Обязанности и достижения</label>
+                <textarea class="form-control" name="responsibilities[]" rows="3" required placeholder="Опишите ваши обязанности и достижения..."></textarea>
+            </div>
+        </div>
+    `;
+    container.appendChild(experienceItem);
+}
+
+function removeExperience(button) {
+    const experienceItem = button.closest('.experience-item');
+    if (experienceItem) {
+        experienceItem.remove();
+    }
+}
+
+// Динамическое добавление языков
+function addLanguage() {
+    const container = document.getElementById('languagesContainer');
+    const languageItem = document.createElement('div');
+    languageItem.className = 'language-item';
+    languageItem.innerHTML = `
+        <select class="form-control" name="language[]" style="flex: 2;" required>
+            <option value="">Выберите язык</option>
+            <option value="Русский">Русский</option>
+            <option value="Английский">Английский</option>
+            <option value="Немецкий">Немецкий</option>
+            <option value="Французский">Французский</option>
+            <option value="Испанский">Испанский</option>
+            <option value="Китайский">Китайский</option>
+        </select>
+        <select class="form-control" name="language_level[]" style="flex: 1;" required>
+            <option value="">Уровень</option>
+            <option value="A1">A1 (Начальный)</option>
+            <option value="A2">A2 (Элементарный)</option>
+            <option value="B1">B1 (Средний)</option>
+            <option value="B2">B2 (Выше среднего)</option>
+            <option value="C1">C1 (Продвинутый)</option>
+            <option value="C2">C2 (В совершенстве)</option>
+            <option value="Носитель">Носитель</option>
+        </select>
+        <button type="button" class="btn btn-danger btn-sm" onclick="removeLanguage(this)">
+            <i class="fas fa-times"></i>
+        </button>
+    `;
+    container.appendChild(languageItem);
+}
+
+function removeLanguage(button) {
+    const languageItem = button.closest('.language-item');
+    if (languageItem && document.querySelectorAll('.language-item').length > 1) {
+        languageItem.remove();
+    }
+}
+
+// Подсказки: должность подставляется целиком, навык - после последней запятой,
+// учебное заведение - в текущую строку
+function currentToken(field, element) {
+    const before = element.value.slice(0, element.selectionStart);
+    let start = 0;
+    if (field === 'skills') {
+        start = Math.max(before.lastIndexOf(','), before.lastIndexOf('\n')) + 1;
+    } else if (field === 'education') {
+        start = before.lastIndexOf('\n') + 1;
+    }
+    return { start: start, text: before.slice(start).trim() };
+}
+
+function attachSuggest(element) {
+    const field = element.dataset.suggest;
+    const list = document.createElement('div');
+    list.className = 'suggest-list';
+    element.parentNode.classList.add('suggest-container');
+    element.parentNode.appendChild(list);
+    let timer = null;
+    let requestId = 0;
+
+    function hide() {
+        list.innerHTML = '';
+        list.style.display = 'none';
+    }
+
+    function apply(value) {
+        const token = currentToken(field, element);
+        const head = element.value.slice(0, token.start) + (field === 'skills' && token.start > 0 ? ' ' : '');
+        element.value = head + value + element.value.slice(element.selectionStart);
+        const caret = (head + value).length;
+        element.setSelectionRange(caret, caret);
+        hide();
+    }
+
+    element.addEventListener('input', function() {
+        clearTimeout(timer);
+        const text = currentToken(field, element).text;
+        if (!text) {
+            hide();
+            return;
+        }
+        timer = setTimeout(function() {
+            const id = ++requestId;
+            fetch(element.dataset.suggestUrl + '?q=' + encodeURIComponent(text))
+                .then(response => response.ok ? response.json() : [])
+                .then(values => {
+                    if (id !== requestId) {
+                        return;
+                    }
+                    hide();
+                    values.filter(value => value.toLowerCase() !== text.toLowerCase()).forEach(value => {
+                        const item = document.createElement('div');
+                        item.className = 'suggest-item';
+                        item.textContent = value;
+                        item.addEventListener('mousedown', function(e) {
+                            e.preventDefault();
+                            apply(value);
+                        });
+                        list.appendChild(item);
+                    });
+                    list.style.display = list.children.length ? 'block' : 'none';
+                })
+                .catch(hide);
+        }, 150);
+    });
+    element.addEventListener('blur', hide);
+    element.addEventListener('keydown', function(e) {
+        if (e.key === 'Escape') {
+            hide();
+        }
+    });
+}
+
+// Инициализация
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-suggest]').forEach(attachSuggest);
+
+    // Добавляем первый язык при загрузке
+    if (document.querySelectorAll('.language-item').length === 0) {
+        addLanguage();
+    }
+
+    // Анимация
+    const formElements = document.querySelectorAll('.fade-in');
+    formElements.forEach((el, index) => {
+        setTimeout(() => {
+            el.style.opacity = '1';
+            el.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+});
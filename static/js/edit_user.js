@@ -0,0 +1,42 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const formElements = document.querySelectorAll('.fade-in');
+    formElements.forEach((el, index) => {
+        setTimeout(() => {
+            el.style.opacity = '1';
+            el.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+
+    // Фокус на первое поле
+    const firstField = document.getElementById('full_name');
+    if (firstField) {
+        firstField.focus();
+    }
+
+    // Форматирование даты рождения
+    const birthDateInput = document.getElementById('birth_date');
+    if (birthDateInput) {
+        // Устанавливаем максимальную дату (сегодняшний день)
+        const today = new Date();
+        const maxDate = new Date(today.getFullYear() - 16, today.getMonth(), today.getDate());
+        birthDateInput.max = maxDate.toISOString().split('T')[0];
+    }
+
+    // Подтверждение отправки
+    const form = document.querySelector('form');
+    if (form) {
+        form.addEventListener('submit', function() {
+            const submitBtn = form.querySelector('.btn-submit');
+            if (submitBtn) {
+                const originalText = submitBtn.innerHTML;
+                submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Сохранение...';
+                submitBtn.disabled = true;
+
+                setTimeout(() => {
+                    submitBtn.innerHTML = originalText;
+                    submitBtn.disabled = false;
+                }, 3000);
+            }
+        });
+    }
+});
@@ -0,0 +1,104 @@
+// PDF рендерится на сервере; если сервер не справился, собираем его в браузере
+function generatePDF() {
+    const btn = event.target.closest('button');
+    const originalHTML = btn.innerHTML;
+    btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Генерация...';
+    btn.disabled = true;
+
+    const pdfUrl = btn.dataset.pdfUrl;
+    let attempts = 0;
+
+    function restore() {
+        btn.innerHTML = originalHTML;
+        btn.disabled = false;
+    }
+
+    function poll(statusUrl) {
+        fetch(statusUrl).then(r => r.json()).then(job => {
+            if (job.status === 'done') {
+                window.location = job.download_url;
+                restore();
+            } else if (job.status === 'failed' || ++attempts > 60) {
+                generateClientPDF();
+            } else if (job.status === 'unknown') {
+                // Задачу никто не выполняет (воркер перезапущен): ставим заново
+                start();
+            } else {
+                setTimeout(() => poll(statusUrl), 1000);
+            }
+        }).catch(generateClientPDF);
+    }
+
+    function start() {
+        fetch(pdfUrl).then(response => {
+            if (response.status === 200) {
+                response.blob().then(blob => {
+                    const link = document.createElement('a');
+                    link.href = URL.createObjectURL(blob);
+                    link.download = 'резюме.pdf';
+                    link.click();
+                    restore();
+                });
+            } else if (response.status === 202) {
+                response.json().then(job => poll(job.status_url));
+            } else {
+                generateClientPDF();
+            }
+        }).catch(generateClientPDF);
+    }
+
+    start();
+
+    function generateClientPDF() {
+        // Загружаем библиотеку динамически
+        if (typeof html2pdf === 'undefined') {
+            const script = document.createElement('script');
+            script.src = 'https://cdnjs.cloudflare.com/ajax/libs/html2pdf.js/0.10.1/html2pdf.bundle.min.js';
+            script.onload = function() {
+                createPDF();
+            };
+            document.head.appendChild(script);
+        } else {
+            createPDF();
+        }
+    }
+
+    function createPDF() {
+        const element = document.getElementById('pdfContent');
+
+        // Простые настройки
+        const opt = {
+            margin: [20, 20, 20, 20],
+            filename: btn.dataset.filename,
+            image: { type: 'jpeg', quality: 1 },
+            html2canvas: { 
+                scale: 2,
+                useCORS: true,
+                logging: false,
+                backgroundColor: '#ffffff',
+                windowWidth: element.scrollWidth,
+                windowHeight: element.scrollHeight
+            },
+            jsPDF: { 
+                unit: 'mm', 
+                format: 'a4', 
+                orientation: 'portrait'
+            }
+        };
+
+        html2pdf().set(opt).from(element).save().then(() => {
+            btn.innerHTML = originalHTML;
+            btn.disabled = false;
+        }).catch(error => {
+            console.error('Ошибка:', error);
+            btn.innerHTML = originalHTML;
+            btn.disabled = false;
+            alert('Ошибка при создании PDF. Используйте кнопку "Печать" и выберите "Сохранить как PDF"');
+        });
+    }
+}
+
+// Альтернатива: использовать встроенную печать
+function printAsPDF() {
+    window.print();
+}
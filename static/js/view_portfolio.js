@@ -0,0 +1,137 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Анимация элементов
+    const fadeElements = document.querySelectorAll('.fade-in');
+    fadeElements.forEach((el, index) => {
+        setTimeout(() => {
+            el.style.opacity = '1';
+            el.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+
+    // Плавная прокрутка
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function(e) {
+            e.preventDefault();
+            const target = document.querySelector(this.getAttribute('href'));
+            if (target) {
+                target.scrollIntoView({
+                    behavior: 'smooth',
+                    block: 'start'
+                });
+            }
+        });
+    });
+
+    // Подсветка активной секции при прокрутке
+    const sections = document.querySelectorAll('.info-section');
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.style.backgroundColor = 'rgba(67, 97, 238, 0.02)';
+                setTimeout(() => {
+                    entry.target.style.backgroundColor = '';
+                }, 1000);
+            }
+        });
+    }, {
+        threshold: 0.1
+    });
+
+    sections.forEach(section => observer.observe(section));
+
+    // Копирование контактов по клику
+    document.querySelectorAll('.contact-item').forEach(item => {
+        item.addEventListener('click', function(e) {
+            if (e.target.tagName !== 'A') {
+                const link = this.querySelector('a');
+                if (link) {
+                    const text = link.textContent.trim();
+                    navigator.clipboard.writeText(text).then(() => {
+                        const originalHTML = this.innerHTML;
+                        this.innerHTML = '<i class="fas fa-check"></i> Скопировано!';
+                        this.style.backgroundColor = '#e8f4ff';
+
+                        setTimeout(() => {
+                            this.innerHTML = originalHTML;
+                            this.style.backgroundColor = '';
+                        }, 2000);
+                    });
+                }
+            }
+        });
+    });
+
+    // Адаптивное меню для мобильных
+    function adaptMenu() {
+        const navbarNav = document.querySelector('.navbar-nav');
+        // На публичной странице навигации нет
+        if (!navbarNav) {
+            return;
+        }
+        if (window.innerWidth < 768) {
+            if (!document.querySelector('.menu-toggle')) {
+                const menuToggle = document.createElement('button');
+                menuToggle.className = 'menu-toggle';
+                menuToggle.innerHTML = '<i class="fas fa-bars"></i>';
+                menuToggle.style.cssText = `
+                    background: var(--primary-color);
+                    color: white;
+                    border: none;
+                    border-radius: 5px;
+                    padding: 8px 12px;
+                    cursor: pointer;
+                    font-size: 1.2rem;
+                `;
+
+                document.querySelector('.navbar .container').appendChild(menuToggle);
+
+                menuToggle.addEventListener('click', function() {
+                    navbarNav.style.display = navbarNav.style.display === 'flex' ? 'none' : 'flex';
+                });
+
+                navbarNav.style.display = 'none';
+                navbarNav.style.cssText += `
+                    position: absolute;
+                    top: 100%;
+                    left: 0;
+                    right: 0;
+                    background: white;
+                    flex-direction: column;
+                    padding: 1rem;
+                    box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+                    z-index: 1000;
+                `;
+            }
+        } else {
+            const menuToggle = document.querySelector('.menu-toggle');
+            if (menuToggle) {
+                menuToggle.remove();
+            }
+            navbarNav.style.display = 'flex';
+            navbarNav.style.cssText = '';
+        }
+    }
+
+    adaptMenu();
+    window.addEventListener('resize', adaptMenu);
+
+    // Добавляем эффект параллакса для фона
+    window.addEventListener('scroll', function() {
+        const scrolled = window.pageYOffset;
+        const background = document.querySelector('body');
+        background.style.backgroundPosition = `0% ${scrolled * 0.5}px`;
+    });
+
+    // Подсветка навыков при наведении
+    document.querySelectorAll('.skill-tag').forEach(tag => {
+        tag.addEventListener('mouseenter', function() {
+            this.style.transform = 'scale(1.05)';
+            this.style.boxShadow = '0 5px 15px rgba(67, 97, 238, 0.3)';
+        });
+
+        tag.addEventListener('mouseleave', function() {
+            this.style.transform = '';
+            this.style.boxShadow = '';
+        });
+    });
+});
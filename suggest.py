@@ -0,0 +1,147 @@
+# Подсказки для полей профиля (образование, навыки, должность) по префиксу.
+# Индекс - отсортированный массив ключей в памяти воркера, поиск через bisect.
+# Строится из значений user_profiles, пополняется при сохранении профиля и
+# периодически перестраивается, чтобы подхватить изменения из других воркеров.
+import bisect
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+SUGGEST_FIELDS = ('education', 'skills', 'job_position')
+SUGGEST_LIMIT = 10
+SUGGEST_REFRESH_SECONDS = int(os.environ.get('SUGGEST_REFRESH_SECONDS', '300'))
+MAX_VALUE_LENGTH = 100
+# Сколько ключей просматривать на короткий префикс перед ранжированием
+SCAN_LIMIT = 500
+
+
+def normalize(text):
+    """Ключ для сравнения: без учета регистра, ё = е, одиночные пробелы."""
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def split_values(field, text):
+    """Отдельные значения поля: навыки через запятую, учебное заведение - начало строки."""
+    if not text:
+        return []
+    if field == 'skills':
+        parts = re.split(r'[,;\n]', text)
+    elif field == 'education':
+        parts = [line.split(',', 1)[0] for line in text.splitlines()]
+    else:
+        parts = [text]
+
+    values = []
+    for part in parts:
+        value = ' '.join(part.split()).strip(' .-–—')
+        if value and len(value) <= MAX_VALUE_LENGTH:
+            values.append(value)
+    return values
+
+
+class PrefixIndex:
+    """Значения одного поля. Ключи - каждое значение с начала каждого слова,
+    поэтому «гос» находит «Московский государственный университет»."""
+
+    def __init__(self):
+        self._keys = []
+        self._counts = {}
+
+    def add(self, value, insort=True):
+        norm = normalize(value)
+        counts = self._counts.get(norm)
+        if counts is None:
+            counts = self._counts[norm] = Counter()
+            words = norm.split(' ')
+            for i in range(len(words)):
+                key = (' '.join(words[i:]), norm)
+                if insort:
+                    bisect.insort(self._keys, key)
+                else:
+                    self._keys.append(key)
+        counts[value] += 1
+
+    def sort(self):
+        self._keys.sort()
+
+    def search(self, prefix, limit=SUGGEST_LIMIT):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = set()
+        start = bisect.bisect_left(self._keys, (prefix,))
+        for key, norm in self._keys[start:start + SCAN_LIMIT]:
+            if not key.startswith(prefix):
+                break
+            found.add(norm)
+        # Сначала частые значения, затем более короткие
+        ranked = sorted(found, key=lambda n: (-sum(self._counts[n].values()), len(n), n))
+        # Из вариантов написания показываем самый распространенный
+        return [self._counts[norm].most_common(1)[0][0] for norm in ranked[:limit]]
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class Suggestions:
+    def __init__(self, refresh_seconds=SUGGEST_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._indexes = {field: PrefixIndex() for field in SUGGEST_FIELDS}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def rebuild(self, connection):
+        indexes = {field: PrefixIndex() for field in SUGGEST_FIELDS}
+        cursor = connection.execute(f"SELECT {', '.join(SUGGEST_FIELDS)} FROM user_profiles")
+        while True:
+            rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            for row in rows:
+                for field in SUGGEST_FIELDS:
+                    for value in split_values(field, row[field]):
+                        indexes[field].add(value, insort=False)
+        for index in indexes.values():
+            index.sort()
+        with self._lock:
+            self._indexes = indexes
+            self._loaded_at = time.monotonic()
+
+    def ensure_fresh(self, connection):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.refresh_seconds:
+            return
+        # Перестраивает один поток; остальные пока отвечают по прежнему индексу
+        if not self._rebuild_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at is loaded_at:
+                self.rebuild(connection)
+        finally:
+            self._rebuild_lock.release()
+
+    def add_profile(self, fields):
+        """Добавляет значения сохраненного профиля, не дожидаясь перестройки."""
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            for field in SUGGEST_FIELDS:
+                for value in split_values(field, fields.get(field)):
+                    self._indexes[field].add(value)
+
+    def search(self, field, prefix, limit=SUGGEST_LIMIT):
+        with self._lock:
+            return self._indexes[field].search(prefix, limit)
+
+    def stats(self):
+        with self._lock:
+            stats = {f'{field}_values': len(index) for field, index in self._indexes.items()}
+        loaded_at = self._loaded_at
+        stats['age_seconds'] = round(time.monotonic() - loaded_at, 1) if loaded_at is not None else -1
+        return stats
+
+
+suggestions = Suggestions()
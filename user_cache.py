@@ -0,0 +1,69 @@
+# Кэш пользователей в памяти воркера: имя и статус профиля по user_id.
+# Записи живут USER_CACHE_TTL секунд и сбрасываются при сохранении профиля
+# в этом воркере; изменения из других воркеров видны не позже чем через TTL.
+# Неопубликованный статус страницы портфолио и резюме перепроверяют в базе.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', '10000'))
+# Счетчики карточек админ-панели считаются полным проходом по пользователям
+ADMIN_STATS_TTL = float(os.environ.get('ADMIN_STATS_TTL', '30'))
+
+
+class UserCache:
+    """LRU-кэш с временем жизни записей."""
+
+    def __init__(self, ttl=USER_CACHE_TTL, max_entries=USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id, load):
+        """Состояние пользователя; при промахе вызывается load() и результат кэшируется.
+
+        None (пользователь удален) не кэшируется.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        state = load()
+        if state is not None:
+            with self._lock:
+                self._entries[user_id] = (now + self.ttl, state)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return state
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
+
+
+users = UserCache()
+admin_stats = UserCache(ttl=ADMIN_STATS_TTL, max_entries=1)